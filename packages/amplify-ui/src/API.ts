@@ -80,8 +80,10 @@ export type UpdateLatestMoveInput = {
 
 export type CreateCommentInput = {
   SessionID: string,
+  SK?: string | null,
   Comment: string,
   Author: string,
+  Partial?: boolean | null,
 };
 
 export type Comment = {
@@ -90,6 +92,7 @@ export type Comment = {
   SK?: string | null,
   Comment?: string | null,
   Author?: string | null,
+  Partial?: boolean | null,
 };
 
 export type ErrorResponseInput = {
@@ -256,6 +259,7 @@ export type CreateCommentMutation = {
     SK?: string | null,
     Comment?: string | null,
     Author?: string | null,
+    Partial?: boolean | null,
   } | null,
 };
 
@@ -274,6 +278,7 @@ export type PostQuestionMutation = {
     SK?: string | null,
     Comment?: string | null,
     Author?: string | null,
+    Partial?: boolean | null,
   } | null,
 };
 
@@ -283,6 +288,7 @@ export type CommentatorQuestionMutationVariables = {
   Comment: string,
   Board: string,
   Model: string,
+  RequestID?: string | null,
 };
 
 export type CommentatorQuestionMutation = {
@@ -292,6 +298,7 @@ export type CommentatorQuestionMutation = {
     SK?: string | null,
     Comment?: string | null,
     Author?: string | null,
+    Partial?: boolean | null,
   } | null,
 };
 
@@ -428,6 +435,7 @@ export type ListCommentsQuery = {
     SK?: string | null,
     Comment?: string | null,
     Author?: string | null,
+    Partial?: boolean | null,
   } | null > | null,
 };
 
@@ -564,6 +572,7 @@ export type OnCreateCommentSubscription = {
     SK?: string | null,
     Comment?: string | null,
     Author?: string | null,
+    Partial?: boolean | null,
   } | null,
 };
 
@@ -578,6 +587,7 @@ export type OnPostQuestionSubscription = {
     SK?: string | null,
     Comment?: string | null,
     Author?: string | null,
+    Partial?: boolean | null,
   } | null,
 };
 
@@ -141,6 +141,7 @@ export const createComment = /* GraphQL */ `mutation CreateComment($input: Creat
     SK
     Comment
     Author
+    Partial
     __typename
   }
 }
@@ -166,6 +167,7 @@ export const postQuestion = /* GraphQL */ `mutation PostQuestion(
     SK
     Comment
     Author
+    Partial
     __typename
   }
 }
@@ -179,6 +181,7 @@ export const commentatorQuestion = /* GraphQL */ `mutation CommentatorQuestion(
   $Comment: String!
   $Board: String!
   $Model: String!
+  $RequestID: String
 ) {
   commentatorQuestion(
     History: $History
@@ -186,11 +189,13 @@ export const commentatorQuestion = /* GraphQL */ `mutation CommentatorQuestion(
     Comment: $Comment
     Board: $Board
     Model: $Model
+    RequestID: $RequestID
   ) {
     SessionID
     SK
     Comment
     Author
+    Partial
     __typename
   }
 }
@@ -115,6 +115,7 @@ export const listComments = /* GraphQL */ `query ListComments($SessionID: ID!) {
     SK
     Comment
     Author
+    Partial
     __typename
   }
 }
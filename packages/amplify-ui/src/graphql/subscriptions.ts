@@ -166,6 +166,7 @@ export const onCreateComment = /* GraphQL */ `subscription OnCreateComment(
     SK
     Comment
     Author
+    Partial
     __typename
   }
 }
@@ -179,6 +180,7 @@ export const onPostQuestion = /* GraphQL */ `subscription OnPostQuestion($Sessio
     SK
     Comment
     Author
+    Partial
     __typename
   }
 }
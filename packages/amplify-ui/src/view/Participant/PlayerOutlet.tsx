@@ -86,9 +86,16 @@ const PageSubscriptions = ({
         },
       });
 
+    // Streamed commentator answers are not part of the comments
     const createComment = client
       .graphql({ query: onCreateComment, variables: { SessionID } })
-      .subscribe({ next: () => comments.refetch() });
+      .subscribe({
+        next: ({ data }) => {
+          if (data.onCreateComment.SK?.startsWith("COMMENT#")) {
+            comments.refetch();
+          }
+        },
+      });
 
     const postQuestion = client
       .graphql({ query: onPostQuestion, variables: { SessionID } })
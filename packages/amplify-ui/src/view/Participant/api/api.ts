@@ -142,11 +142,13 @@ export const useCommentatorQuestion = (SessionID: string) => {
       Comment,
       Board,
       Model,
+      RequestID,
     }: {
       History: any[];
       Comment: string;
       Board: string;
       Model: string;
+      RequestID?: string;
     }) => {
       const { data } = await client.graphql({
         query: commentatorQuestion,
@@ -156,6 +158,7 @@ export const useCommentatorQuestion = (SessionID: string) => {
           Comment,
           Board,
           Model,
+          RequestID,
         },
       });
 
@@ -21,6 +21,8 @@ import {
 import mic from "./mic.png";
 
 import { useQuery } from "@tanstack/react-query";
+import { generateClient } from "aws-amplify/api";
+import { onCreateComment } from "../../../../graphql/subscriptions";
 
 import { modelOptions } from "../../../Admin/pages/Sessions/modelOptions";
 import SpeechRecognition, {
@@ -87,6 +89,23 @@ export const Commentator = () => {
   const latestMove = useQuery({ queryKey: ["latestMove", SessionID] }) as any;
 
   const [commentary, setCommentary] = useState([]);
+  const [requestId, setRequestId] = useState(null);
+
+  // A streamed answer keeps its SK, every update replaces the same message
+  const upsertComment = (comment) => {
+    setCommentary((oldArray) => {
+      const index = oldArray.findIndex((msg) => msg.SK === comment.SK);
+
+      if (index === -1) {
+        return [...oldArray, comment];
+      }
+      // Subscription updates can arrive after the final answer
+      if (comment.Partial && !oldArray[index].Partial) {
+        return oldArray;
+      }
+      return oldArray.map((msg, i) => (i === index ? comment : msg));
+    });
+  };
 
   useEffect(() => {
     if (latestMove.data.Move) {
@@ -94,15 +113,31 @@ export const Commentator = () => {
     }
   }, [latestMove.data.Move]);
 
+  // Only this question's answer is streamed to its STREAM# key
+  useEffect(() => {
+    if (!requestId) {
+      return;
+    }
+
+    const client = generateClient();
+    const streamed = client
+      .graphql({
+        query: onCreateComment,
+        variables: { SessionID, SK: `STREAM#${requestId}` },
+      })
+      .subscribe({
+        next: ({ data }) => upsertComment(data.onCreateComment),
+      });
+
+    return () => streamed.unsubscribe();
+  }, [requestId]);
+
   const postQuestion = async () => {
     if (transcript) {
       try {
-        const resp = await mutateAsync({
-          History: commentary,
-          Comment: transcript,
-          Board: board.fen,
-          Model: provider.value,
-        });
+        const history = commentary;
+        const RequestID = crypto.randomUUID();
+        setRequestId(RequestID);
 
         setCommentary((oldArray) => [
           ...oldArray,
@@ -112,9 +147,18 @@ export const Commentator = () => {
             Board: board.fen,
             Model: provider.value,
           },
-          resp,
         ]);
 
+        const resp = await mutateAsync({
+          History: history,
+          Comment: transcript,
+          Board: board.fen,
+          Model: provider.value,
+          RequestID,
+        });
+
+        upsertComment(resp);
+
         convertToSpeech(resp.Comment);
       } catch (error) {
         console.error(error);
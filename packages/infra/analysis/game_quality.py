@@ -0,0 +1,272 @@
+"""
+Move-quality analysis of finished games.
+
+Reads the MoveHistory of every completed session (the SanList for games
+recorded before it), replays it with python-chess and scores every position
+with a pool of Stockfish processes, one per worker. Each model gets its
+average centipawn loss (ACPL), mistake and blunder rates, written as one
+compact JSON summary. Evaluations are cached per (FEN, depth) in --cache,
+so positions shared between games (openings, repeated runs) are only
+analyzed once.
+
+    python analysis/game_quality.py --table <TableName> --out summary.json
+    python analysis/game_quality.py --sessions sessions.json --workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import chess
+from multiprocessing import Pool
+
+ANALYSIS = os.path.dirname(os.path.abspath(__file__))
+HANDLER = os.path.join(ANALYSIS, "..", "lib", "StepFunction", "genaiNewMove")
+
+# Evaluations are clamped so a single lost mate doesn't dominate the average
+EVAL_CAP = 1000
+MATE_SCORE = 10000
+
+# Centipawn loss from which a move counts as a mistake / a blunder
+MISTAKE_LOSS = 100
+BLUNDER_LOSS = 300
+
+_engine = None
+
+
+def game_record(session):
+    """MoveHistory of a session, sessions recorded before it only have a SanList"""
+    # Imported once main() has set up the path
+    import gamerecord
+
+    if session.get("MoveHistory"):
+        return session["MoveHistory"]
+    return gamerecord.from_san_list(session.get("SanList"))
+
+
+def position_key(fen):
+    """The halfmove clock and fullmove number don't change the evaluation"""
+    return " ".join(fen.split(" ")[:4])
+
+
+def load_table_sessions(table_name):
+    """Completed sessions and the game record of their latest move"""
+    import boto3
+
+    dynamodb_client = boto3.client("dynamodb")
+    params = {
+        "TableName": table_name,
+        "FilterExpression": "SK = :s AND GameStatus = :c",
+        "ExpressionAttributeValues": {
+            ":s": {"S": "SESSION"},
+            ":c": {"S": "COMPLETED"},
+        },
+    }
+
+    sessions = []
+    while True:
+        resp = dynamodb_client.scan(**params)
+        for item in resp["Items"]:
+            latest = dynamodb_client.get_item(
+                TableName=table_name,
+                Key={"SessionID": item["SessionID"], "SK": {"S": "MOVE#LATEST"}},
+            ).get("Item", {})
+            sessions.append(
+                {
+                    "SessionID": item["SessionID"]["S"],
+                    "White": item.get("WhiteID", item.get("White", {})).get("S"),
+                    "Black": item.get("BlackID", item.get("Black", {})).get("S"),
+                    "MoveHistory": latest.get("MoveHistory", {}).get("S", ""),
+                    "SanList": latest.get("SanList", {}).get("S", ""),
+                }
+            )
+        if "LastEvaluatedKey" not in resp:
+            return sessions
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def replay(session):
+    """(FEN before, FEN after, player) for every move of the game"""
+    import gamerecord
+
+    board = chess.Board()
+    plies = []
+    for move in gamerecord.moves(game_record(session)):
+        player = session["White"] if board.turn else session["Black"]
+        before = board.fen()
+        board.push(move)
+        plies.append((before, board.fen(), player))
+
+    return plies
+
+
+def terminal_score(board):
+    """Score of a finished position for the side to move, None if it isn't finished"""
+    if board.is_checkmate():
+        return -EVAL_CAP
+    if board.is_game_over(claim_draw=False):
+        return 0
+    return None
+
+
+def init_worker(path, depth, threads, hash_size):
+    global _engine
+    from stockfish import Stockfish
+
+    _engine = Stockfish(
+        path,
+        depth=depth,
+        parameters={"Threads": threads, "Hash": hash_size},
+        turn_perspective=True,
+    )
+
+
+def evaluate(fen):
+    """Centipawn score of the position for the side to move, clamped to EVAL_CAP"""
+    _engine.set_fen_position(fen)
+    evaluation = _engine.get_evaluation()
+
+    if evaluation["type"] == "mate":
+        score = MATE_SCORE if evaluation["value"] > 0 else -MATE_SCORE
+    else:
+        score = evaluation["value"]
+
+    return (position_key(fen), max(-EVAL_CAP, min(EVAL_CAP, score)))
+
+
+def load_cache(path, depth):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get(str(depth), {})
+
+
+def save_cache(path, depth, scores):
+    cache = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            cache = json.load(f)
+    cache[str(depth)] = scores
+    with open(path, "w") as f:
+        json.dump(cache, f)
+
+
+def analyze(sessions, path, depth, workers, threads, hash_size, cache_path=None):
+    games = [replay(s) for s in sessions]
+    scores = load_cache(cache_path, depth)
+
+    pending = {}
+    for plies in games:
+        for fen in [fen for before, after, _ in plies for fen in (before, after)]:
+            key = position_key(fen)
+            if key in scores or key in pending:
+                continue
+            score = terminal_score(chess.Board(fen))
+            if score is None:
+                pending[key] = fen
+            else:
+                scores[key] = score
+
+    print(
+        f"{len(games)} games, {len(pending)} positions to analyze, "
+        f"{len(scores)} cached",
+        file=sys.stderr,
+    )
+
+    started = time.monotonic()
+    if pending:
+        with Pool(
+            workers, initializer=init_worker, initargs=(path, depth, threads, hash_size)
+        ) as pool:
+            chunksize = max(1, len(pending) // (workers * 8))
+            for key, score in pool.imap_unordered(
+                evaluate, pending.values(), chunksize
+            ):
+                scores[key] = score
+    print(f"Analyzed in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+    if cache_path:
+        save_cache(cache_path, depth, scores)
+
+    return summarize(games, scores)
+
+
+def summarize(games, scores):
+    models = {}
+    for plies in games:
+        players = set()
+        for before, after, player in plies:
+            # Best score available to the mover against what the move left them
+            loss = max(0, scores[position_key(before)] + scores[position_key(after)])
+
+            stats = models.setdefault(
+                player,
+                {"games": 0, "moves": 0, "loss": 0, "mistakes": 0, "blunders": 0},
+            )
+            stats["moves"] += 1
+            stats["loss"] += loss
+            stats["mistakes"] += MISTAKE_LOSS <= loss < BLUNDER_LOSS
+            stats["blunders"] += loss >= BLUNDER_LOSS
+            players.add(player)
+
+        for player in players:
+            models[player]["games"] += 1
+
+    return {
+        model: {
+            "games": stats["games"],
+            "moves": stats["moves"],
+            "acpl": round(stats["loss"] / stats["moves"], 1),
+            "mistake_rate": round(stats["mistakes"] / stats["moves"], 3),
+            "blunder_rate": round(stats["blunders"] / stats["moves"], 3),
+        }
+        for model, stats in sorted(models.items(), key=lambda m: str(m[0]))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--table", help="DynamoDB table of the sessions")
+    source.add_argument(
+        "--sessions", help="JSON list of {SessionID, White, Black, MoveHistory}"
+    )
+    parser.add_argument(
+        "--stockfish", default=os.environ.get("StockfishPath", "stockfish")
+    )
+    parser.add_argument("--depth", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=1, help="Threads per engine")
+    parser.add_argument("--hash", type=int, default=64, help="Hash (MB) per engine")
+    parser.add_argument("--cache", default="analysis_cache.json")
+    parser.add_argument("--out", help="Write the summary to this file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, HANDLER)
+
+    if args.table:
+        sessions = load_table_sessions(args.table)
+    else:
+        with open(args.sessions) as f:
+            sessions = json.load(f)
+
+    summary = analyze(
+        sessions,
+        args.stockfish,
+        args.depth,
+        args.workers,
+        args.threads,
+        args.hash,
+        args.cache,
+    )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
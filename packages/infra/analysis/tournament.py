@@ -0,0 +1,217 @@
+"""
+Local round-robin tournament between models.
+
+Plays every pair of --models against each other (--games per pair, colors
+alternating) by calling genaiNewMove's predict_next_move directly, without
+Step Functions. Games run concurrently on a thread pool and share the
+Bedrock client and the Stockfish pool; each model has its own concurrency
+limit so one slow model can't hold every worker. Writes the games as PGN,
+the standings as JSON and a sessions file game_quality.py can analyze.
+
+    python analysis/tournament.py --stand-in --games 10 --workers 32
+    python analysis/tournament.py --models anthropic.claude-3-haiku-20240307-v1:0 \\
+        mistral.mistral-7b-instruct-v0:2 --games 20 --out results/
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import threading
+import contextlib
+import chess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ANALYSIS = os.path.dirname(os.path.abspath(__file__))
+HANDLER = os.path.join(ANALYSIS, "..", "lib", "StepFunction", "genaiNewMove")
+BENCHMARKS = os.path.join(ANALYSIS, "..", "benchmarks")
+
+# Layer packages installed by `npm run postinstall`, if present
+LAYER = os.path.join(ANALYSIS, "..", "lib", "StepFunction", "genaiNewMovePackages")
+
+MODELS = [
+    "anthropic.claude-3-haiku-20240307-v1:0",
+    "amazon.titan-text-express-v1",
+    "meta.llama2-70b-chat-v1",
+    "mistral.mistral-7b-instruct-v0:2",
+]
+
+# Games are adjudicated as a draw after this many plies
+MAX_PLIES = 200
+
+# Time budget of a single move, the Lambda timeout in the deployed game
+MOVE_TIMEOUT = 60000
+
+
+def pairings(models, games):
+    """Every pair plays games times, switching colors after each game"""
+    for white, black in itertools.combinations(models, 2):
+        for game in range(games):
+            yield (white, black) if game % 2 == 0 else (black, white)
+
+
+def play_game(white, black, limits, max_plies):
+    # Imported once main() has set up the path and environment
+    import index
+    import gamerecord
+    from deadline import Deadline
+
+    board = chess.Board()
+    move_history = ""
+    attempts = {white: 0, black: 0}
+    fallbacks = {white: 0, black: 0}
+
+    while not board.is_game_over(claim_draw=True) and board.ply() < max_plies:
+        model_id = white if board.turn else black
+        with limits[model_id]:
+            # Nobody reads the commentary, don't pay for engine move justifications
+            _, _, message_attempts = index.predict_next_move(
+                model_id, board, Deadline(MOVE_TIMEOUT), justify=False
+            )
+
+        move_history = gamerecord.append(move_history, board.peek())
+        attempts[model_id] += sum(1 for a in message_attempts if "source" not in a)
+        fallbacks[model_id] += any(
+            a.get("source") == "engine" for a in message_attempts
+        )
+
+    result = board.result(claim_draw=True)
+    return {
+        "White": white,
+        "Black": black,
+        "Result": "1/2-1/2" if result == "*" else result,
+        "Plies": board.ply(),
+        "MoveHistory": move_history,
+        "Attempts": attempts,
+        "Fallbacks": fallbacks,
+    }
+
+
+def standings(games):
+    table = {}
+    for game in games:
+        white, black = game["White"], game["Black"]
+        points = {"1-0": (1, 0), "0-1": (0, 1)}.get(game["Result"], (0.5, 0.5))
+
+        for model_id, score in ((white, points[0]), (black, points[1])):
+            row = table.setdefault(
+                model_id,
+                dict.fromkeys(
+                    ["games", "points", "wins", "draws", "losses", "moves"]
+                    + ["attempts", "fallbacks"],
+                    0,
+                ),
+            )
+            row["games"] += 1
+            row["points"] += score
+            row["wins" if score == 1 else "losses" if score == 0 else "draws"] += 1
+            # White makes the odd plies
+            row["moves"] += (game["Plies"] + (model_id == white)) // 2
+            row["attempts"] += game["Attempts"][model_id]
+            row["fallbacks"] += game["Fallbacks"][model_id]
+
+    for row in table.values():
+        moves = max(row["moves"], 1)
+        row["attempts_per_move"] = round(row.pop("attempts") / moves, 2)
+        row["fallback_rate"] = round(row.pop("fallbacks") / moves, 3)
+
+    return dict(sorted(table.items(), key=lambda r: -r[1]["points"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--games", type=int, default=2, help="Games per pair")
+    parser.add_argument("--workers", type=int, default=16, help="Games at once")
+    parser.add_argument(
+        "--model-concurrency", type=int, default=4, help="Moves at once per model"
+    )
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument(
+        "--stand-in",
+        action="store_true",
+        help="Play against the local Bedrock stand-in instead of Bedrock",
+    )
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--illegal-rate", type=float, default=0.2)
+    parser.add_argument("--log", default=os.devnull, help="Write move output here")
+    parser.add_argument("--out", default="tournament")
+    args = parser.parse_args()
+
+    sys.path[:0] = [HANDLER, os.path.join(LAYER, "python")]
+    os.environ.setdefault("StockfishPoolSize", str(args.workers))
+    os.environ.setdefault("VerboseLogSampleRate", "0")
+
+    if args.stand_in:
+        sys.path.insert(0, BENCHMARKS)
+        from move_latency import LAMBDA_ENV
+        from standins import FakeBedrock
+
+        for name, value in LAMBDA_ENV.items():
+            os.environ.setdefault(name, value)
+
+    import index
+    import gamerecord
+
+    if args.stand_in:
+        index._bedrock_client = FakeBedrock(
+            latency_ms=args.latency_ms, illegal_rate=args.illegal_rate
+        )
+
+    limits = {
+        m: threading.BoundedSemaphore(args.model_concurrency) for m in args.models
+    }
+    games = []
+    started = time.monotonic()
+
+    with open(args.log, "a") as log, contextlib.redirect_stdout(log):
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [
+                executor.submit(play_game, white, black, limits, args.max_plies)
+                for white, black in pairings(args.models, args.games)
+            ]
+            for future in as_completed(futures):
+                game = future.result()
+                games.append(game)
+                print(
+                    f"[{len(games)}/{len(futures)}] {game['White']} - "
+                    f"{game['Black']}: {game['Result']} in {game['Plies']} plies",
+                    file=sys.stderr,
+                )
+    index.engine_manager.close()
+
+    print(
+        f"Played {len(games)} games in {time.monotonic() - started:.1f}s",
+        file=sys.stderr,
+    )
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "games.pgn"), "w") as f:
+        for number, game in enumerate(games, 1):
+            headers = {
+                "Event": "GenAI Chess tournament",
+                "Round": str(number),
+                "White": game["White"],
+                "Black": game["Black"],
+                "Result": game["Result"],
+            }
+            f.write(gamerecord.to_pgn(game["MoveHistory"], headers) + "\n\n")
+
+    with open(os.path.join(args.out, "sessions.json"), "w") as f:
+        json.dump(
+            [{"SessionID": f"tournament-{i}", **g} for i, g in enumerate(games)],
+            f,
+            indent=2,
+        )
+
+    results = standings(games)
+    with open(os.path.join(args.out, "results.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Import-time report for the Python Lambda handlers.
+
+Runs `python -X importtime -c "import index"` in every handler directory and
+prints the cumulative import time of the handler together with its slowest
+imports. Pass --max-ms to fail when a handler takes longer than that to
+import, so cold-start regressions get caught.
+
+    python benchmarks/import_time.py --top 10 --max-ms 500
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+LIB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib")
+
+HANDLERS = {
+    "genaiNewMove": "StepFunction/genaiNewMove",
+    "postQuestion": "AppSync/Mutation/postQuestion/postQuestion",
+    "commentatorQuestion": "AppSync/Mutation/commentatorQuestion/commentatorQuestion",
+}
+
+# Layer packages installed by `npm run postinstall`, if present
+LAYER = os.path.join(LIB, "StepFunction/genaiNewMovePackages/python")
+
+# Placeholder values for the environment the Lambda runtime provides
+LAMBDA_ENV = {
+    "AWS_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_SESSION_TOKEN": "benchmark",
+    "BedrockRegion": "us-east-1",
+    "GRAPHQL_URL": "https://localhost/graphql",
+    "TableName": "benchmark",
+}
+
+
+def measure(path, statement="import index"):
+    """Cumulative import time (us) of every module imported by the statement"""
+    env = {**os.environ, **LAMBDA_ENV}
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in [path, LAYER, env.get("PYTHONPATH")] if p and os.path.exists(p)
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = {}
+    failed = False
+    # Modules the interpreter imports on startup are not the handler's cost
+    startup = measure(LIB, "pass")
+
+    for name, relative in HANDLERS.items():
+        try:
+            modules = measure(os.path.join(LIB, relative))
+        except RuntimeError as e:
+            print(f"{name}: import failed ({e})")
+            failed = True
+            continue
+
+        total = modules.get("index", 0) / 1000
+        top = sorted(modules.items(), key=lambda m: m[1], reverse=True)
+        top = [(m, us) for m, us in top if m != "index" and m not in startup]
+        top = top[: args.top]
+        report[name] = {"total_ms": total, "top": dict(top)}
+
+        print(f"{name}: {total:.1f}ms")
+        for module, us in top:
+            print(f"  {us / 1000:>8.1f}ms  {module}")
+
+        if args.max_ms is not None and total > args.max_ms:
+            print(f"{name}: import time above {args.max_ms}ms")
+            failed = True
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
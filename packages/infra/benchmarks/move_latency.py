@@ -0,0 +1,217 @@
+"""
+Offline latency benchmark for the genaiNewMove handler.
+
+Drives index.handler over the positions in positions.json with Bedrock,
+AppSync and Stockfish replaced by local stand-ins (see standins.py and
+stand_in_engine.py), and reports per model the p50/p95/p99 move latency,
+attempts per move, engine fallback rate and peak traced memory. Pass
+--recordings with a TranscriptDir to replay recorded responses, and
+--compare with an earlier --json report to see the difference. Pass
+--secondary-latency-ms to hedge every request across a second stand-in
+region with its own latency profile.
+
+    python benchmarks/move_latency.py --moves 50 --json run.json
+    python benchmarks/move_latency.py --moves 50 --compare run.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import contextlib
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+HANDLER = os.path.join(BENCHMARKS, "..", "lib", "StepFunction", "genaiNewMove")
+
+# Layer packages installed by `npm run postinstall`, if present
+LAYER = os.path.join(BENCHMARKS, "..", "lib", "StepFunction", "genaiNewMovePackages")
+
+MODELS = [
+    "anthropic.claude-3-sonnet-20240229-v1:0",
+    "amazon.titan-text-express-v1",
+    "ai21.j2-ultra-v1",
+    "cohere.command-text-v14",
+    "meta.llama2-70b-chat-v1",
+    "mistral.mistral-7b-instruct-v0:2",
+]
+
+# Placeholder values for the environment the Lambda runtime provides
+LAMBDA_ENV = {
+    "AWS_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_SESSION_TOKEN": "benchmark",
+    "BedrockRegion": "us-east-1",
+    "StockfishPath": os.path.join(BENCHMARKS, "stand_in_engine.py"),
+    "VerboseLogSampleRate": "0",
+}
+
+# Lambda timeout of the function, see stepfunction-tasks.ts
+TIMEOUT_MS = 60000
+
+
+class Context:
+    """The part of the Lambda context object the handler uses"""
+
+    def __init__(self, timeout_ms=TIMEOUT_MS):
+        self.deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self):
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+def build_event(model_id, position, session_id):
+    # Imported once main() has set up the path
+    import gamerecord
+
+    return {
+        "SessionID": session_id,
+        "Session": {"Item": {"WhiteID": {"S": model_id}, "BlackID": {"S": model_id}}},
+        "LatestMove": {
+            "Item": {
+                "Move": {"S": position["fen"]},
+                "MoveHistory": {"S": gamerecord.from_san_list(position["san_list"])},
+                "MoveCount": {"N": str(position["move_count"])},
+            }
+        },
+    }
+
+
+def percentile(values, share):
+    values = sorted(values)
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(round(share * (len(values) - 1))))]
+
+
+def run_model(index, model_id, positions, moves, log):
+    latencies = []
+    attempts = []
+    fallbacks = 0
+    sources = {}
+
+    tracemalloc.start()
+    for i in range(moves):
+        position = positions[i % len(positions)]
+        event = build_event(model_id, position, f"benchmark-{i}")
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(log):
+            result = index.handler(event, Context())
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        messages = result["Messages"]
+        source = messages[-1].get("source", "model") if messages else "model"
+        sources[source] = sources.get(source, 0) + 1
+        fallbacks += source == "engine"
+        attempts.append(sum(1 for m in messages if "source" not in m))
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "moves": moves,
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "mean_attempts": round(sum(attempts) / moves, 2),
+        "fallback_rate": round(fallbacks / moves, 3),
+        "peak_memory_kb": round(peak / 1024),
+        "sources": sources,
+    }
+
+
+def print_report(report, baseline=None):
+    columns = ["p50_ms", "p95_ms", "p99_ms", "mean_attempts", "fallback_rate"]
+    columns.append("peak_memory_kb")
+    print(f"{'model':<42}" + "".join(f"{c:>16}" for c in columns))
+
+    for model_id, result in report.items():
+        row = f"{model_id:<42}"
+        for column in columns:
+            cell = f"{result[column]}"
+            previous = (baseline or {}).get(model_id, {}).get(column)
+            if previous:
+                cell += f" ({(result[column] - previous) / previous:+.0%})"
+            row += f"{cell:>16}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--moves", type=int, default=20, help="Moves per model")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--illegal-rate", type=float, default=0.2)
+    parser.add_argument("--secondary-latency-ms", type=float, default=None)
+    parser.add_argument("--secondary-jitter", type=float, default=0.2)
+    parser.add_argument("--appsync-latency-ms", type=float, default=30)
+    parser.add_argument(
+        "--positions", default=os.path.join(BENCHMARKS, "positions.json")
+    )
+    parser.add_argument("--recordings", help="TranscriptDir to replay responses from")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log", default=os.devnull, help="Write handler output here")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Earlier --json report to compare with")
+    args = parser.parse_args()
+
+    sys.path[:0] = [HANDLER, os.path.join(LAYER, "python")]
+    sys.path.insert(0, BENCHMARKS)
+    from standins import FakeAppSync, FakeBedrock, load_recordings
+
+    appsync = FakeAppSync(latency_ms=args.appsync_latency_ms)
+    os.environ.update(LAMBDA_ENV, GRAPHQL_URL=appsync.start())
+
+    import index
+
+    index._bedrock_client = FakeBedrock(
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        illegal_rate=args.illegal_rate,
+        recordings=load_recordings(args.recordings) if args.recordings else None,
+        seed=args.seed,
+    )
+
+    if args.secondary_latency_ms is not None:
+        from hedging import HedgedClient
+
+        index._bedrock_client = HedgedClient(
+            index._bedrock_client,
+            FakeBedrock(
+                latency_ms=args.secondary_latency_ms,
+                jitter=args.secondary_jitter,
+                illegal_rate=args.illegal_rate,
+                seed=args.seed,
+            ),
+        )
+
+    with open(args.positions) as f:
+        positions = json.load(f)
+
+    report = {}
+    with open(args.log, "a") as log:
+        for model_id in args.models:
+            print(f"Running {args.moves} moves for {model_id}", file=sys.stderr)
+            report[model_id] = run_model(index, model_id, positions, args.moves, log)
+
+    appsync.stop()
+    index.engine_manager.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
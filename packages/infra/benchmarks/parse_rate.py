@@ -0,0 +1,187 @@
+"""
+Parse-rate benchmark of the move parser.
+
+Runs the responses in move_outputs.json through the shared parser
+(parsing.parse_move) and through the split on <move> tags the adapters
+used before it, and reports per output style the share of responses that
+yield the expected legal move (or, for responses without one, no move) and
+the mean parse time. Every response a parser misses costs a full extra
+Bedrock round trip in the game, every move it makes up is played for the
+model.
+
+The responses are written by hand in the shapes seen in transcripts,
+including descriptive answers such as "Knight to f3" that must not parse.
+They are not recordings, so the rates show which shapes a parser handles,
+not how often models produce them. For that pass --transcripts with a
+TranscriptDir the handler wrote: every recorded response is parsed again
+and, as nobody labelled them, counts when it yields a legal move. The
+rates are then per provider.
+
+    python benchmarks/parse_rate.py
+    python benchmarks/parse_rate.py --failures
+    python benchmarks/parse_rate.py --transcripts transcripts/
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import chess
+from collections import defaultdict
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+HANDLER = os.path.join(BENCHMARKS, "..", "lib", "StepFunction", "genaiNewMove")
+
+# Times every response is parsed for the timing
+REPEAT = 20
+
+# Text of a response body per provider, read as the adapters read it
+RESPONSE_TEXT = {
+    "ai21": lambda body: body["completions"][0]["data"]["text"],
+    "amazon": lambda body: body["results"][0]["outputText"],
+    "anthropic": lambda body: body["content"][0]["text"],
+    "cohere": lambda body: body["generations"][0]["text"],
+    "meta": lambda body: body["generation"],
+    "mistral": lambda body: body["outputs"][0]["text"],
+}
+
+# The prompt listed the legal moves, numbered answers refer to them
+LEGAL_MOVES_PROMPT = "The legal moves in this position are:"
+
+
+def transcript_corpus(directory):
+    """
+    Cases for the responses in the transcripts a LocalSink wrote
+    (TranscriptDir), without an expected move, styled by provider.
+    """
+    from standins import FEN
+
+    corpus = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(root, name)) as f:
+                transcript = json.load(f)
+
+            provider = transcript["model"].split(".")[0]
+            for attempt in transcript["attempts"]:
+                prompt = attempt.get("prompt") or attempt.get("system_prompt", "")
+                fen = FEN.search(prompt)
+                if "response_body" not in attempt or not fen:
+                    continue
+                try:
+                    text = RESPONSE_TEXT[provider](attempt["response_body"])
+                except (KeyError, IndexError, TypeError):
+                    continue
+                corpus.append(
+                    {
+                        "style": provider,
+                        "provider": provider,
+                        "fen": fen.group(1),
+                        "text": text,
+                        "legal_moves": LEGAL_MOVES_PROMPT in prompt,
+                    }
+                )
+
+    return corpus
+
+
+def split_move(text, board, legal_moves=None):
+    """The extraction the adapters did before parsing.py"""
+    try:
+        move = text.split("<move>")[1].split("</move>")[0].replace("\n", "")
+        return board.san(board.parse_san(move))
+    except Exception:
+        return None
+
+
+def run(parse, corpus):
+    from prompts import list_legal_moves
+
+    results = defaultdict(lambda: {"responses": 0, "parsed": 0, "us": 0.0})
+    failures = []
+
+    for case in corpus:
+        board = chess.Board(case["fen"])
+        legal_moves = list_legal_moves(board) if case.get("legal_moves") else None
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            move = parse(case["text"], board, legal_moves)
+        elapsed = (time.perf_counter() - started) / REPEAT * 1e6
+
+        # Recorded responses count when they yield a legal move
+        if "expected" not in case:
+            try:
+                board.parse_san(move or "")
+                parsed = True
+            except ValueError:
+                parsed = False
+        # Without an expected move anything that isn't a legal move is right
+        elif case["expected"] is None:
+            try:
+                board.parse_san(move or "")
+                parsed = False
+            except ValueError:
+                parsed = True
+        else:
+            parsed = move == case["expected"]
+
+        for style in (case["style"], "all"):
+            row = results[style]
+            row["responses"] += 1
+            row["parsed"] += parsed
+            row["us"] += elapsed
+        if not parsed:
+            failures.append((case, move))
+
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--corpus", default=os.path.join(BENCHMARKS, "move_outputs.json")
+    )
+    parser.add_argument(
+        "--failures", action="store_true", help="List the responses not parsed"
+    )
+    parser.add_argument(
+        "--transcripts", help="TranscriptDir to parse recorded responses from"
+    )
+    args = parser.parse_args()
+
+    sys.path.insert(0, HANDLER)
+    from parsing import parse_move
+
+    if args.transcripts:
+        corpus = transcript_corpus(args.transcripts)
+    else:
+        with open(args.corpus) as f:
+            corpus = json.load(f)
+
+    split, _ = run(split_move, corpus)
+    parsed, failures = run(parse_move, corpus)
+
+    print(
+        f"{'style':<18}{'responses':>10}{'split_rate':>12}{'parse_rate':>12}"
+        f"{'split_us':>10}{'parse_us':>10}"
+    )
+    for style in sorted(parsed, key=lambda s: (s == "all", s)):
+        old, new = split[style], parsed[style]
+        n = new["responses"]
+        print(
+            f"{style:<18}{n:>10}{old['parsed'] / n:>12.2f}{new['parsed'] / n:>12.2f}"
+            f"{old['us'] / n:>10.1f}{new['us'] / n:>10.1f}"
+        )
+
+    if args.failures:
+        for case, move in failures:
+            expected = case.get("expected", "a legal move")
+            print(f"\n{case['style']}: expected {expected}, got {move}")
+            print(case["text"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Minimal UCI engine for offline benchmarks: answers the commands the
+stockfish package and python-chess send and plays a random legal move.
+A search deepens one ply every DEPTH_MS until it reaches the requested
+depth, the movetime (capped) or a stop, so the engine fallback still
+costs time and a depth limit still ends it early.
+"""
+
+import sys
+import time
+import random
+import threading
+import chess
+
+MAX_SLEEP_MS = 200
+
+# Time a ply of depth takes
+DEPTH_MS = 10
+
+# Depth of a search without a depth limit
+MAX_DEPTH = 99
+
+# The options the engine pool and game_quality.py set
+OPTIONS = [
+    "option name Threads type spin default 1 min 1 max 1024",
+    "option name Hash type spin default 16 min 1 max 33554432",
+    "option name Skill Level type spin default 20 min 0 max 20",
+    "option name UCI_Elo type spin default 1320 min 1320 max 3190",
+    "option name UCI_LimitStrength type check default false",
+]
+
+
+def search(board, depth, movetime, stop):
+    moves = list(board.legal_moves)
+    move = random.choice(moves).uci() if moves else "(none)"
+    ends_at = time.monotonic() + min(movetime, MAX_SLEEP_MS) / 1000
+
+    for ply in range(1, depth + 1):
+        if stop.wait(DEPTH_MS / 1000) or time.monotonic() >= ends_at:
+            break
+        print(f"info depth {ply} score cp 0 pv {move}", flush=True)
+
+    print(f"bestmove {move}", flush=True)
+
+
+def main():
+    board = chess.Board()
+    searching = None
+    stop = threading.Event()
+    print("Stockfish 16 by the Stockfish developers (stand-in)", flush=True)
+
+    for line in iter(sys.stdin.readline, ""):
+        command = line.strip()
+
+        if command == "uci":
+            print("id name Stockfish 16", *OPTIONS, "uciok", sep="\n", flush=True)
+        elif command == "isready":
+            if searching:
+                searching.join()
+            print("readyok", flush=True)
+        elif command.startswith("position "):
+            position, _, moves = command[len("position ") :].partition(" moves")
+            board = (
+                chess.Board()
+                if position == "startpos"
+                else chess.Board(position[len("fen ") :])
+            )
+            for move in moves.split():
+                board.push_uci(move)
+        elif command.startswith("go"):
+            parts = command.split()
+            depth = int(parts[parts.index("depth") + 1]) if "depth" in parts else 0
+            movetime = (
+                int(parts[parts.index("movetime") + 1]) if "movetime" in parts else 0
+            )
+            if searching:
+                searching.join()
+            stop.clear()
+            searching = threading.Thread(
+                target=search,
+                args=(
+                    board.copy(),
+                    depth or MAX_DEPTH,
+                    movetime or MAX_SLEEP_MS,
+                    stop,
+                ),
+            )
+            searching.start()
+        elif command == "stop":
+            stop.set()
+        elif command == "d":
+            print(f"Fen: {board.fen()}\nKey: 0\nCheckers: ", flush=True)
+        elif command == "quit":
+            stop.set()
+            break
+
+
+if __name__ == "__main__":
+    main()
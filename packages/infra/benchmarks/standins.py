@@ -0,0 +1,190 @@
+"""
+Local stand-ins for the services the move path calls, so benchmarks run
+offline and cost nothing: a Bedrock runtime client that replies in each
+provider's response shape, and an AppSync endpoint on localhost.
+"""
+
+import io
+import os
+import re
+import json
+import math
+import time
+import random
+import threading
+import chess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FEN = re.compile(r"([1-8pnbrqkPNBRQK/]+ [wb] [KQkq-]+ [a-h1-8-]+ \d+ \d+)")
+
+# Replies a model gives when it does not produce a legal move
+ILLEGAL_REPLIES = [
+    "<move>Ke9</move><reason>The king walks up the board.</reason>",
+    "<move>Qxh9</move><reason>The queen takes on h9.</reason>",
+    "<move>O-O-O-O</move><reason>Castling brings the king to safety.</reason>",
+    "I would play the knight to the center to control more squares.",
+]
+
+
+def response_body(model_id, text):
+    """Response body in the shape the provider's adapter parses"""
+    provider = model_id.split(".")[0]
+
+    if provider == "anthropic":
+        return {"content": [{"type": "text", "text": text}]}
+    if provider == "amazon":
+        return {"results": [{"outputText": text}]}
+    if provider == "ai21":
+        return {"completions": [{"data": {"text": text}}]}
+    if provider == "cohere":
+        return {"generations": [{"text": text}]}
+    if provider == "meta":
+        return {"generation": text}
+    if provider == "mistral":
+        return {"outputs": [{"text": text}]}
+
+    raise Exception(f"model_id not supported {model_id}")
+
+
+def load_recordings(directory):
+    """
+    Response bodies from the transcripts a LocalSink wrote (TranscriptDir),
+    keyed on (provider, FEN), in the order they were recorded.
+    """
+    recordings = {}
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(root, name)) as f:
+                transcript = json.load(f)
+
+            provider = transcript["model"].split(".")[0]
+            for attempt in transcript["attempts"]:
+                if "response_body" not in attempt:
+                    continue
+                prompt = attempt.get("prompt") or attempt.get("system_prompt", "")
+                fen = FEN.search(prompt)
+                if fen:
+                    recordings.setdefault((provider, fen.group(1)), []).append(
+                        (attempt["response_body"], attempt.get("latency_ms"))
+                    )
+
+    return recordings
+
+
+class FakeBedrock:
+    """
+    Drop-in for the bedrock-runtime client used by invoke_model. Latency is
+    log-normal around latency_ms; with probability illegal_rate the reply
+    holds no legal move. Positions found in the recordings replay the
+    recorded responses and latencies instead.
+    """
+
+    def __init__(
+        self, latency_ms=800, jitter=0.5, illegal_rate=0.2, recordings=None, seed=None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.illegal_rate = illegal_rate
+        self.recordings = recordings or {}
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._replayed = {}
+        self._lock = threading.Lock()
+
+    def _sample_latency(self):
+        if not self.latency_ms:
+            return 0
+        return self._random.lognormvariate(math.log(self.latency_ms), self.jitter)
+
+    def _recorded(self, provider, fen):
+        replies = self.recordings.get((provider, fen))
+        if not replies:
+            return None
+
+        with self._lock:
+            index = self._replayed.get((provider, fen), 0)
+            self._replayed[(provider, fen)] = index + 1
+
+        return replies[index % len(replies)]
+
+    def _reply(self, fen):
+        if fen is None or self._random.random() < self.illegal_rate:
+            return self._random.choice(ILLEGAL_REPLIES)
+
+        board = chess.Board(fen)
+        move = board.san(self._random.choice(list(board.legal_moves)))
+        return f"<move>{move}</move><reason>{move} improves the position.</reason>"
+
+    def invoke_model(self, body, modelId, accept=None, contentType=None):
+        self.calls += 1
+        fen = FEN.search(body)
+        fen = fen.group(1) if fen else None
+
+        recorded = self._recorded(modelId.split(".")[0], fen)
+        if recorded:
+            payload, latency_ms = recorded
+            latency_ms = (
+                latency_ms if latency_ms is not None else self._sample_latency()
+            )
+        else:
+            text = self._reply(fen)
+            payload = response_body(modelId, text)
+            latency_ms = self._sample_latency()
+
+        time.sleep(latency_ms / 1000)
+        raw = json.dumps(payload).encode()
+
+        return {
+            "body": io.BytesIO(raw),
+            "ResponseMetadata": {
+                "HTTPHeaders": {
+                    "x-amzn-bedrock-input-token-count": str(len(body) // 4),
+                    "x-amzn-bedrock-output-token-count": str(len(raw) // 4),
+                }
+            },
+        }
+
+
+class FakeAppSync:
+    """createComment endpoint on localhost, answering after latency_ms"""
+
+    def __init__(self, latency_ms=30, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self._server = None
+
+    def start(self):
+        appsync = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                appsync.calls += 1
+                time.sleep(appsync.latency_ms / 1000)
+
+                if random.random() < appsync.error_rate:
+                    resp = {"errors": [{"message": "stand-in error"}]}
+                else:
+                    resp = {"data": {"createComment": request["variables"]["input"]}}
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps(resp).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        return f"http://127.0.0.1:{self._server.server_address[1]}/graphql"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
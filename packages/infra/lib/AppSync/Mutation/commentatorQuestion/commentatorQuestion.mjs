@@ -3,7 +3,11 @@ import { util } from "@aws-appsync/utils";
 export const request = (ctx) => {
   return {
     operation: "Invoke",
-    payload: ctx.arguments,
+    // Paged conversations are kept per spectator
+    payload: {
+      ...ctx.arguments,
+      Spectator: ctx.identity?.sub ?? ctx.identity?.cognitoIdentityId,
+    },
   };
 };
 
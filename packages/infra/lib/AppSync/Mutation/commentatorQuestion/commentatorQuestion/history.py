@@ -0,0 +1,205 @@
+import os
+import hashlib
+from datetime import datetime
+
+from clients import get_model
+from ratelimit import rate_limiter
+
+# Number of most recent messages (questions and answers) kept verbatim
+HISTORY_TURNS = int(os.environ.get("HistoryTurns", 6)) // 2 * 2
+
+# Approximate token budget of the verbatim messages
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HistoryTokenBudget", 1000))
+
+SUMMARY_MODEL = os.environ.get("SummaryModel", "anthropic.claude-3-haiku-20240307-v1:0")
+
+SK_PREFIX = "COMMENTATOR#"
+
+# Rolling summary of the paged history per session and spectator:
+# {"until": SK, "summary": text}
+_summaries = {}
+
+# Summaries of event histories keyed on the digest of the turns they fold, every
+# spectator sends their own history so the session doesn't identify it
+_folded = {}
+
+# Event history summaries kept per container, the oldest is dropped first
+MAX_FOLDED = 1000
+
+_dynamodb_client = None
+
+
+def get_dynamodb_client():
+    global _dynamodb_client
+
+    if _dynamodb_client is None:
+        import boto3
+
+        _dynamodb_client = boto3.client("dynamodb")
+
+    return _dynamodb_client
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+
+def fit_budget(turns):
+    """Drop the oldest question/answer pairs until the turns fit the token budget"""
+    while (
+        len(turns) > 2
+        and sum(estimate_tokens(t["Comment"]) for t in turns) > HISTORY_TOKEN_BUDGET
+    ):
+        turns = turns[2:]
+
+    return turns
+
+
+def summarize(summary, turns):
+    from langchain_core.messages import HumanMessage
+    from langchain_community.chat_models import BedrockChat
+
+    conversation = "\n".join(
+        f"{'Spectator' if i % 2 == 0 else 'Commentator'}: {t['Comment']}"
+        for i, t in enumerate(turns)
+    )
+    prompt = f"""Here is a summary of a conversation about a chess game contained in <summary></summary> XML tags, followed by the messages that came after it contained in <conversation></conversation> XML tags.
+        <summary>{summary}</summary>
+        <conversation>{conversation}</conversation>
+
+        Write an updated summary of the whole conversation in 100 words or less. Answer with the summary only."""
+
+    chat = get_model(BedrockChat, SUMMARY_MODEL)
+    return rate_limiter.call(
+        SUMMARY_MODEL, chat, [HumanMessage(content=prompt)]
+    ).content
+
+
+def fold(summary, new_turns):
+    """Fold the turns that fell out of the window into a rolling summary"""
+    if new_turns:
+        print(f"Folding {len(new_turns)} turns into the history summary")
+        summary = summarize(summary, new_turns)
+
+    return summary
+
+
+def turn_digests(turns):
+    """Digest of every prefix of the turns, digests[k] covers turns[:k]"""
+    digests = [""]
+    for turn in turns:
+        digests.append(
+            hashlib.sha256((digests[-1] + turn["Comment"]).encode()).hexdigest()
+        )
+
+    return digests
+
+
+def with_summary(summary, turns):
+    if not summary:
+        return turns
+
+    return [
+        {"Comment": f"Summary of our conversation so far: {summary}"},
+        {"Comment": "Understood."},
+    ] + turns
+
+
+def window_history(history):
+    """
+    History as received in the event: the last turns that fit the budget are
+    kept verbatim, everything before them is represented by the summary.
+    Only the turns after the longest already summarized prefix are folded.
+    """
+    recent = fit_budget(history[-HISTORY_TURNS:] if HISTORY_TURNS else [])
+    older = history[: len(history) - len(recent)]
+    if not older:
+        return recent
+
+    digests = turn_digests(older)
+    done = max(k for k in range(len(digests)) if k == 0 or digests[k] in _folded)
+    summary = _folded.get(digests[done], "")
+
+    if done < len(older):
+        summary = fold(summary, older[done:])
+        _folded[digests[-1]] = summary
+        if len(_folded) > MAX_FOLDED:
+            del _folded[next(iter(_folded))]
+
+    return with_summary(summary, recent)
+
+
+def query_turns(session_id, after, before, limit=None, newest_first=False):
+    params = {
+        "TableName": os.environ["TableName"],
+        "KeyConditionExpression": "SessionID = :s AND SK BETWEEN :a AND :b",
+        "ExpressionAttributeValues": {
+            ":s": {"S": session_id},
+            ":a": {"S": after},
+            ":b": {"S": before},
+        },
+        "ScanIndexForward": not newest_first,
+    }
+    if limit:
+        params["Limit"] = limit
+
+    turns = []
+    while True:
+        resp = get_dynamodb_client().query(**params)
+        turns += [
+            {"SK": i["SK"]["S"], "Comment": i["Comment"]["S"]}
+            for i in resp["Items"]
+            if i["SK"]["S"] not in (after, before)
+        ]
+        if limit or "LastEvaluatedKey" not in resp:
+            return turns
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def spectator_prefix(spectator):
+    """SK prefix of one spectator's conversation, COMMENTATOR#<spectator>#"""
+    return f"{SK_PREFIX}{spectator}#"
+
+
+def page_history(session_id, spectator):
+    """
+    History of the spectator's conversation paged from the table instead of
+    the event. Only the newest turns are read on every question; older turns
+    are read once, when they fall out of the window and need to be folded
+    into the summary.
+    """
+    prefix = spectator_prefix(spectator)
+    recent = query_turns(
+        session_id, prefix, prefix + "~", HISTORY_TURNS, newest_first=True
+    )
+    recent = fit_budget(recent[::-1])
+    if not recent:
+        return []
+
+    cached = _summaries.get((session_id, spectator))
+    until = recent[0]["SK"]
+    if cached and cached["until"] == until:
+        return with_summary(cached["summary"], recent)
+
+    after = cached["until"] if cached and cached["until"] < until else prefix
+    summary = "" if after == prefix else cached["summary"]
+    summary = fold(summary, query_turns(session_id, after, until))
+    _summaries[(session_id, spectator)] = {"until": until, "summary": summary}
+
+    return with_summary(summary, recent)
+
+
+def store_turns(session_id, spectator, comment, answer):
+    """Store the question and the answer so later questions can page them"""
+    for text in (comment, answer):
+        get_dynamodb_client().put_item(
+            TableName=os.environ["TableName"],
+            Item={
+                "SessionID": {"S": session_id},
+                "SK": {
+                    "S": f"{spectator_prefix(spectator)}{datetime.now().isoformat()}"
+                },
+                "Comment": {"S": text},
+            },
+        )
@@ -1,49 +1,86 @@
 import os
-import requests
+import time
 from datetime import datetime
 
-from models.meta import callLlama
-from models.amazon import callTitan
-from models.ai21 import callJurrasic
-from models.cohere import callCommand
-from models.anthropic import callClaude
-from models.mistral_ai import callMistral
+from answers import answer_cache, history_digest
+from clients import timings
+from history import page_history, store_turns, window_history
+from ratelimit import rate_limiter
+from registry import get_adapter
+from utils import CommentStream
+
+
+def report_latency(model_id, total_ms):
+    # Client setup only happens on the first question of a model per container.
+    # The wait for the response headers includes connecting, which a new
+    # client always does and a warm one only when its connections were closed
+    setup_ms = timings.get("setup_ms", 0)
+    print(
+        {
+            "model": model_id,
+            "client_setup_ms": round(setup_ms),
+            "headers_ms": round(timings.get("headers_ms", 0)),
+            "model_ms": round(total_ms - setup_ms),
+            "client_reused": "setup_ms" not in timings,
+            "new_connection": timings.get("new_client", False),
+        }
+    )
 
 
 def handler(event, context):
     print(event)
     session_id = event["SessionID"]
-    history = event["History"]
     comment = event["Comment"]
     board = event["Board"]
     model_id = event["Model"]
 
-    if model_id.startswith("amazon"):
-        answer = callTitan(board, model_id, comment, history)
-
-    elif model_id.startswith("anthropic"):
-        answer = callClaude(board, model_id, comment, history)
-
-    elif model_id.startswith("ai21"):
-        answer = callJurrasic(board, model_id, comment)
+    # Only the latest turns are sent verbatim, older ones as a rolling summary.
+    # The table holds a conversation per spectator, without an identity to
+    # tell them apart the event's history is used
+    spectator = event.get("Spectator")
+    page_from_table = os.environ.get("HistorySource") == "table" and spectator
+    history = (
+        page_history(session_id, spectator)
+        if page_from_table
+        else window_history(event["History"])
+    )
 
-    elif model_id.startswith("cohere"):
-        answer = callCommand(board, model_id, comment)
-
-    elif model_id.startswith("meta"):
-        answer = callLlama(board, model_id, comment, history)
+    # Streamed answers are written into this comment while they are generated,
+    # outside the COMMENT# feed, only the asker subscribes to its request's key
+    request_id = event.get("RequestID")
+    stream = None
+    if os.environ.get("StreamAnswers") == "true" and request_id:
+        sk = f"STREAM#{request_id}"
+        stream = CommentStream(session_id, model_id, sk)
+    else:
+        sk = f"COMMENT#{datetime.now().isoformat()}"
 
-    elif model_id.startswith("mistral"):
-        answer = callMistral(board, model_id, comment, history)
+    timings.clear()
+    started = time.monotonic()
+    answer = answer_cache.get_or_answer(
+        session_id,
+        model_id,
+        board,
+        comment,
+        lambda: rate_limiter.call(
+            model_id, get_adapter(model_id), board, model_id, comment, history, stream
+        ),
+        # Follow-up questions only mean the same thing in the same conversation
+        context=history_digest(history),
+    )
+    if stream:
+        stream.close(answer)
+    report_latency(model_id, (time.monotonic() - started) * 1000)
 
-    else:
-        raise Exception(f"model_id not supported {model_id}")
+    if page_from_table:
+        store_turns(session_id, spectator, comment, answer)
 
     answer_obj = {
         "SessionID": session_id,
-        "SK": f"COMMENT#{datetime.now().isoformat()}",
+        "SK": sk,
         "Comment": answer,
         "Author": model_id,
+        "Partial": False,
     }
 
     return answer_obj
@@ -1,11 +1,12 @@
-import os
 from langchain.prompts import PromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_community.chat_models import BedrockChat
 
+from clients import generate, get_model
 
-def callMistral(board, model_id, comment, history):
-    chat = BedrockChat(model_id=model_id, region_name=os.environ["BedrockRegion"])
+
+def callMistral(board, model_id, comment, history, on_token=None):
+    chat = get_model(BedrockChat, model_id)
 
     prompt = """I'm going to give you a Forsyth-Edwards Notation (FEN) of a chess game contained in <fen></fen> XML tags. Then I'm going to ask you a question about the chess game. I'd like you to answer the question. Here is the Forsyth-Edwards Notation (FEN):
         <fen>{board}</fen>
@@ -34,4 +35,4 @@ def callMistral(board, model_id, comment, history):
 
     print(messages)
 
-    return chat(messages).content
+    return generate(chat, messages, on_token)
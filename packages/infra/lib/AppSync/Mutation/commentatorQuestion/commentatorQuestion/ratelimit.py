@@ -0,0 +1,198 @@
+import os
+import time
+import threading
+
+# Bedrock calls per second allowed per model id, unset means no limit
+RATE_LIMIT = float(os.environ.get("BedrockRateLimit", 0))
+
+# Calls that can be made at once after an idle period
+BURST = float(os.environ.get("BedrockRateBurst", 0)) or max(1.0, RATE_LIMIT)
+
+# Seconds a call waits for its turn before it is given up
+MAX_WAIT = 5
+
+# Consecutive failed calls after which a model is no longer called
+BREAKER_THRESHOLD = int(os.environ.get("BreakerThreshold", 5))
+
+# Seconds an open breaker waits before a single call probes the model again
+BREAKER_COOLDOWN = int(os.environ.get("BreakerCooldown", 30))
+
+# Seconds a shared window item is kept before DynamoDB expires it
+WINDOW_TTL = 60
+
+# Errors of Bedrock itself, by botocore error code or exception class. Anything
+# else, like a caller giving up on its own deadline, says nothing about the model
+SERVICE_ERRORS = (
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelTimeoutException",
+    "ModelNotReadyException",
+    "ModelErrorException",
+    "EndpointConnectionError",
+    "ConnectTimeoutError",
+    "ReadTimeoutError",
+)
+
+
+def is_throttle(e):
+    return "ThrottlingException" in str(e) or "Too many requests" in str(e)
+
+
+def is_service_error(e):
+    return is_throttle(e) or any(
+        name in str(e) or name == type(e).__name__ for name in SERVICE_ERRORS
+    )
+
+
+class RateLimiter:
+    """
+    Token bucket and circuit breaker per model id around Bedrock calls. The
+    bucket lives in memory; when a table name is given every call also takes
+    a slot of a per-second counter in DynamoDB, so the containers of every
+    function calling the model share the limit. The breaker opens after
+    BREAKER_THRESHOLD consecutive throttles or Bedrock service errors; while
+    it is open calls fail right away, and after the cooldown one call probes
+    the model and closes the breaker again if it succeeds.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=BURST, table_name=None):
+        self.rate = rate
+        self.burst = burst
+        self.table_name = table_name
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._dynamodb_client = None
+
+    @property
+    def dynamodb_client(self):
+        if self._dynamodb_client is None:
+            import boto3
+
+            self._dynamodb_client = boto3.client("dynamodb")
+        return self._dynamodb_client
+
+    def available(self, model_id):
+        """False while the model's breaker is open and not ready for a probe"""
+        breaker = self._breakers.get(model_id)
+        return (
+            breaker is None
+            or breaker["opened_at"] is None
+            or time.monotonic() - breaker["opened_at"] >= BREAKER_COOLDOWN
+        )
+
+    def _allow(self, model_id):
+        with self._lock:
+            if not self.available(model_id):
+                return False
+
+            breaker = self._breakers.get(model_id)
+            if breaker and breaker["opened_at"] is not None:
+                # Half open: this call is the probe, the others wait for another cooldown
+                print(f"{model_id} breaker half open, probing")
+                breaker["opened_at"] = time.monotonic()
+
+            return True
+
+    def _take_token(self, model_id):
+        """Seconds until a token is available, 0 when one was taken"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(
+                model_id, {"tokens": self.burst, "updated": now}
+            )
+            bucket["tokens"] = min(
+                self.burst, bucket["tokens"] + (now - bucket["updated"]) * self.rate
+            )
+            bucket["updated"] = now
+
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                return 0
+            return (1 - bucket["tokens"]) / self.rate
+
+    def _take_slot(self, model_id):
+        """Seconds until the next shared window, 0 when a slot was taken"""
+        now = time.time()
+        try:
+            self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={"LimiterKey": {"S": f"{model_id}#{int(now)}"}},
+                UpdateExpression="ADD Calls :one SET ExpiresAt = :expires",
+                ConditionExpression="attribute_not_exists(Calls) OR Calls < :limit",
+                ExpressionAttributeValues={
+                    ":one": {"N": "1"},
+                    ":limit": {"N": str(max(1, int(self.rate)))},
+                    ":expires": {"N": str(int(now) + WINDOW_TTL)},
+                },
+            )
+        except self.dynamodb_client.exceptions.ConditionalCheckFailedException:
+            return 1 - now % 1
+        except Exception as e:
+            # The shared tier is best effort, the in-memory bucket still applies
+            print(f"Shared rate limit failed: {str(e)}")
+
+        return 0
+
+    def acquire(self, model_id, timeout=MAX_WAIT):
+        """Wait until the model may be called, at most timeout seconds"""
+        if not self._allow(model_id):
+            raise Exception(f"{model_id} circuit breaker is open")
+
+        if not self.rate:
+            return
+
+        give_up = time.monotonic() + timeout
+        for take in [self._take_token] + ([self._take_slot] if self.table_name else []):
+            while True:
+                wait = take(model_id)
+                if not wait:
+                    break
+                if time.monotonic() + wait > give_up:
+                    raise Exception(f"{model_id} rate limited for {timeout:.1f}s")
+                time.sleep(wait)
+
+    def record(self, model_id, error=None):
+        """
+        Outcome of a call, a throttle also empties the bucket to back off.
+        Errors that aren't the service's leave the breaker as it is.
+        """
+        if error is not None and not is_service_error(error):
+            return
+
+        with self._lock:
+            breaker = self._breakers.setdefault(
+                model_id, {"failures": 0, "opened_at": None}
+            )
+
+            if error is None:
+                if breaker["opened_at"] is not None:
+                    print(f"{model_id} breaker closed")
+                breaker.update(failures=0, opened_at=None)
+                return
+
+            if is_throttle(error) and model_id in self._buckets:
+                self._buckets[model_id]["tokens"] = 0
+
+            breaker["failures"] += 1
+            if breaker["failures"] >= BREAKER_THRESHOLD:
+                if breaker["opened_at"] is None:
+                    print(
+                        f"{model_id} breaker open after {breaker['failures']} failures"
+                    )
+                breaker["opened_at"] = time.monotonic()
+
+    def call(self, model_id, fn, *args, timeout=MAX_WAIT, **kwargs):
+        self.acquire(model_id, timeout)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(model_id, e)
+            raise
+
+        self.record(model_id)
+        return result
+
+
+rate_limiter = RateLimiter(table_name=os.environ.get("RateLimitTable"))
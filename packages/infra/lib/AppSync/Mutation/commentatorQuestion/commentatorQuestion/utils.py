@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CREATE_COMMENT = """
+mutation CreateComment($input: CreateCommentInput!) {
+    createComment(input: $input) {
+        SK
+        Comment
+        Author
+        Partial
+        SessionID
+    }
+}
+"""
+
+_credentials = None
+
+
+def get_credentials():
+    global _credentials
+
+    if _credentials is None:
+        # Imported here so boto3 stays out of the handler's import time
+        import boto3
+
+        _credentials = boto3.Session().get_credentials()
+
+    return _credentials
+
+
+def send_to_appsync(SessionID, Comment, Author, SK=None, Partial=False):
+    """
+    Creates a comment, or with an SK writes over the comment with that key so
+    every update of a streamed answer lands on the same item.
+    """
+    from botocore.auth import SigV4Auth
+    from botocore.awsrequest import AWSRequest
+
+    comment_input = {
+        "SessionID": SessionID,
+        "Comment": Comment,
+        "Author": Author,
+        "Partial": Partial,
+    }
+    if SK:
+        comment_input["SK"] = SK
+
+    body = json.dumps({"query": CREATE_COMMENT, "variables": {"input": comment_input}})
+    request = AWSRequest(
+        method="POST",
+        url=os.environ["GRAPHQL_URL"],
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    SigV4Auth(get_credentials(), "appsync", os.environ["AWS_REGION"]).add_auth(request)
+
+    with urllib.request.urlopen(
+        urllib.request.Request(
+            request.url,
+            data=body.encode(),
+            headers=dict(request.headers),
+            method="POST",
+        ),
+        timeout=5,
+    ) as response:
+        resp = json.loads(response.read())
+
+    if "errors" in resp:
+        raise Exception(resp)
+
+    return resp
+
+
+class CommentStream:
+    """
+    Token callback that streams an answer into a single comment. Tokens are
+    buffered into sentence sized chunks and every chunk rewrites the comment
+    with the answer so far, marked Partial, in order on a background thread
+    so reading the model stream never waits on AppSync. close() writes the
+    final answer over it.
+    """
+
+    def __init__(self, session_id, author, sk, min_chars=80):
+        self.session_id = session_id
+        self.author = author
+        self.sk = sk
+        self.min_chars = min_chars
+        self.started = time.monotonic()
+        self.first_token_ms = None
+        self._text = ""
+        self._published = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = []
+
+    def __call__(self, token):
+        if self.first_token_ms is None and token:
+            self.first_token_ms = (time.monotonic() - self.started) * 1000
+            print(f"Time to first token: {self.first_token_ms:.0f}ms")
+
+        self._text += token
+        chunk = self._text[self._published :]
+        if len(chunk) >= self.min_chars and chunk.rstrip()[-1:] in ".!?":
+            self._publish(self._text.strip(), partial=True)
+
+    def _publish(self, comment, partial):
+        self._published = len(self._text)
+        self._pending.append(
+            self._executor.submit(
+                send_to_appsync,
+                self.session_id,
+                comment,
+                self.author,
+                self.sk,
+                partial,
+            )
+        )
+
+    def close(self, answer):
+        """Store the final answer in the comment and wait for every update"""
+        self._publish(answer, partial=False)
+        for future in self._pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Streamed comment not published: {str(e)}")
+        self._executor.shutdown()
@@ -2,9 +2,9 @@ import { util } from "@aws-appsync/utils";
 import * as ddb from "@aws-appsync/utils/dynamodb";
 
 export const request = (ctx) => {
-  const { SessionID, ...item } = ctx.arguments.input;
+  const { SessionID, SK, ...item } = ctx.arguments.input;
 
-  return dynamodbPutRequest({ SessionID, item });
+  return dynamodbPutRequest({ SessionID, SK, item });
 };
 
 export const response = (ctx) => {
@@ -15,9 +15,10 @@ export const response = (ctx) => {
   return result;
 };
 
-const dynamodbPutRequest = ({ SessionID, item }) => {
+const dynamodbPutRequest = ({ SessionID, SK, item }) => {
   const datetime = util.time.nowISO8601();
-  const key = { SessionID, SK: `COMMENT#${datetime}` };
+  // Updates of a streamed answer pass the key of the comment they replace
+  const key = { SessionID, SK: SK || `COMMENT#${datetime}` };
 
   return ddb.put({ key, item });
 };
@@ -14,11 +14,9 @@ const s3Client = new S3Client({});
 const TableName = process.env.TableName;
 const Bucket = process.env.S3Bucket;
 
-export const handler = async (event) => {
-  const { SessionID } = event;
-
-  const allMoves = [];
-  // Moves
+// Deletes every item of the session under an SK prefix and returns them
+const deleteItems = async (SessionID, prefix) => {
+  const allItems = [];
   let ExclusiveStartKey;
   do {
     const { Items, LastEvaluatedKey } = await ddbClient.send(
@@ -27,7 +25,7 @@ export const handler = async (event) => {
         KeyConditionExpression: "SessionID = :id AND begins_with(SK, :sk)",
         ExpressionAttributeValues: {
           ":id": SessionID,
-          ":sk": "MOVE#",
+          ":sk": prefix,
         },
         Limit: 25,
       })
@@ -52,47 +50,21 @@ export const handler = async (event) => {
         })
       );
 
-      allMoves.push(...Items);
+      allItems.push(...Items);
     }
   } while (ExclusiveStartKey);
 
-  const allComments = [];
-  // Comments
-  do {
-    const { Items, LastEvaluatedKey } = await ddbClient.send(
-      new QueryCommand({
-        TableName,
-        KeyConditionExpression: "SessionID = :id AND begins_with(SK, :sk)",
-        ExpressionAttributeValues: {
-          ":id": SessionID,
-          ":sk": "COMMENT#",
-        },
-        Limit: 25,
-      })
-    );
-    ExclusiveStartKey = LastEvaluatedKey;
+  return allItems;
+};
 
-    if (Items.length) {
-      await ddbClient.send(
-        new BatchWriteCommand({
-          RequestItems: {
-            [process.env.TableName]: Items.map(({ SessionID, SK }) => {
-              return {
-                DeleteRequest: {
-                  Key: {
-                    SessionID,
-                    SK,
-                  },
-                },
-              };
-            }),
-          },
-        })
-      );
+export const handler = async (event) => {
+  const { SessionID } = event;
 
-      allComments.push(...Items);
-    }
-  } while (ExclusiveStartKey);
+  const allMoves = await deleteItems(SessionID, "MOVE#");
+  const allComments = await deleteItems(SessionID, "COMMENT#");
+  // Streamed commentator answers and the paged commentator conversations
+  const allStreams = await deleteItems(SessionID, "STREAM#");
+  const allCommentators = await deleteItems(SessionID, "COMMENTATOR#");
 
   const { Item } = await ddbClient.send(
     new GetCommand({
@@ -111,7 +83,11 @@ export const handler = async (event) => {
     new PutObjectCommand({
       Bucket,
       Key,
-      Body: JSON.stringify({ Session: Item, allMoves, allComments }, null, 2),
+      Body: JSON.stringify(
+        { Session: Item, allMoves, allComments, allStreams, allCommentators },
+        null,
+        2
+      ),
     })
   );
 };
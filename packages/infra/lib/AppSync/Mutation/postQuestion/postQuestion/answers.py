@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Seconds an answer is served for, it is also dropped as soon as the board changes
+ANSWER_TTL = int(os.environ.get("AnswerCacheTTL", 120))
+
+# Seconds to wait for an identical question another container is answering
+PENDING_WAIT = 20
+
+_normalize = re.compile(r"[^a-z0-9 ]")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_question(question):
+    return _whitespace.sub(" ", _normalize.sub("", question.lower())).strip()
+
+
+def history_digest(history):
+    """Short digest of the conversation an answer depends on"""
+    comments = json.dumps([turn["Comment"] for turn in history or []])
+    return hashlib.sha256(comments.encode()).hexdigest()[:16]
+
+
+class AnswerCache:
+    """
+    Answers keyed on (model id, FEN, normalized question), plus a digest of
+    the conversation for answers that depend on one. Entries live in
+    memory for warm invocations, the max_size most recently used, and, when a
+    table name is given, in DynamoDB so every container shares them. Identical questions in flight share one
+    model call: in-process through a Future, across containers through a
+    PENDING item the other callers poll.
+    """
+
+    def __init__(self, ttl=ANSWER_TTL, table_name=None, max_size=256):
+        self.ttl = ttl
+        self.table_name = table_name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+        self._dynamodb_client = None
+
+    @property
+    def dynamodb_client(self):
+        if self._dynamodb_client is None:
+            import boto3
+
+            self._dynamodb_client = boto3.client("dynamodb")
+        return self._dynamodb_client
+
+    def _forget_board(self, session_id, board):
+        """
+        Drop the answers about the previous position once the session moved
+        on, unless another session is still at that position
+        """
+        previous = self._boards.get(session_id)
+        self._boards[session_id] = board
+        self._boards.move_to_end(session_id)
+        while len(self._boards) > self.max_size:
+            self._boards.popitem(last=False)
+
+        if previous and previous != board and previous not in self._boards.values():
+            for key in [k for k in self._entries if k[1] == previous]:
+                del self._entries[key]
+
+    def _remember(self, key, answer):
+        with self._lock:
+            self._entries[key] = {
+                "answer": answer,
+                "expires": time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _claim(self, key):
+        """
+        Mark the question as being answered in the shared table. Returns
+        (answer, claimed): the answer when another container already answered
+        it, claimed when this call holds the PENDING item.
+        """
+        cache_key = "#".join(key)
+        now = int(time.time())
+        try:
+            self.dynamodb_client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "CacheKey": {"S": cache_key},
+                    "Status": {"S": "PENDING"},
+                    "ExpiresAt": {"N": str(now + PENDING_WAIT)},
+                },
+                ConditionExpression="attribute_not_exists(CacheKey) OR ExpiresAt < :now",
+                ExpressionAttributeValues={":now": {"N": str(now)}},
+            )
+            return None, True
+        except self.dynamodb_client.exceptions.ConditionalCheckFailedException:
+            pass
+
+        deadline = time.monotonic() + PENDING_WAIT
+        while time.monotonic() < deadline:
+            item = self.dynamodb_client.get_item(
+                TableName=self.table_name,
+                Key={"CacheKey": {"S": cache_key}},
+                ConsistentRead=True,
+            ).get("Item")
+
+            if item is None or int(item["ExpiresAt"]["N"]) < time.time():
+                return None, False
+            if item["Status"]["S"] == "DONE":
+                return item["Answer"]["S"], False
+            time.sleep(0.5)
+
+        return None, False
+
+    def _release(self, key):
+        """Drop a PENDING item so the callers polling it stop waiting"""
+        try:
+            self.dynamodb_client.delete_item(
+                TableName=self.table_name,
+                Key={"CacheKey": {"S": "#".join(key)}},
+                ConditionExpression="#status = :pending",
+                ExpressionAttributeNames={"#status": "Status"},
+                ExpressionAttributeValues={":pending": {"S": "PENDING"}},
+            )
+        except Exception as e:
+            print(f"Answer cache claim not released: {str(e)}")
+
+    def _store(self, key, answer):
+        self.dynamodb_client.put_item(
+            TableName=self.table_name,
+            Item={
+                "CacheKey": {"S": "#".join(key)},
+                "Status": {"S": "DONE"},
+                "Answer": {"S": answer},
+                "ExpiresAt": {"N": str(int(time.time()) + self.ttl)},
+            },
+        )
+
+    def get_or_answer(
+        self, session_id, model_id, board, question, answer_fn, context=None
+    ):
+        key = (model_id, board, normalize_question(question))
+        if context:
+            key += (context,)
+
+        with self._lock:
+            self._forget_board(session_id, board)
+
+            entry = self._entries.get(key)
+            if entry and entry["expires"] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                print(f"Answer cache hit: {self.stats()}")
+                return entry["answer"]
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            self.hits += 1
+            return in_flight.result()
+
+        try:
+            answer, claimed = None, False
+            if self.table_name:
+                try:
+                    answer, claimed = self._claim(key)
+                except Exception as e:
+                    print(f"Answer cache lookup failed: {str(e)}")
+
+            if answer is None:
+                self.misses += 1
+                try:
+                    answer = answer_fn()
+                except Exception:
+                    if claimed:
+                        self._release(key)
+                    raise
+                if self.table_name:
+                    try:
+                        self._store(key, answer)
+                    except Exception as e:
+                        print(f"Answer cache write failed: {str(e)}")
+            else:
+                self.hits += 1
+
+            self._remember(key, answer)
+            in_flight.set_result(answer)
+            print(f"Answer cache: {self.stats()}")
+
+            return answer
+        except Exception as e:
+            in_flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+answer_cache = AnswerCache(table_name=os.environ.get("AnswerCacheTable"))
@@ -0,0 +1,78 @@
+import os
+import time
+
+# Connection pool and keep-alive shared by every model client of the container,
+# connecting to Bedrock is bounded on its own, apart from the model's answer
+BEDROCK_CONFIG = {
+    "max_pool_connections": 10,
+    "tcp_keepalive": True,
+    "connect_timeout": 5,
+    "retries": {"max_attempts": 3, "mode": "standard"},
+}
+
+_bedrock_clients = {}
+_models = {}
+
+# Time spent on client setup and waiting for Bedrock's response headers during
+# the current request, reset by the handler
+timings = {}
+
+
+def time_send(**kwargs):
+    """before-send hook, a request to Bedrock is about to go out"""
+    timings["sent_at"] = time.monotonic()
+
+
+def time_headers(**kwargs):
+    """
+    response-received hook: the response headers are in, the body may still
+    be streaming. The time since the send covers connecting, when the pool
+    had no open connection, and the model's time to its first byte.
+    """
+    sent_at = timings.pop("sent_at", None)
+    if sent_at is not None:
+        timings["headers_ms"] = timings.get("headers_ms", 0) + (
+            (time.monotonic() - sent_at) * 1000
+        )
+
+
+def get_bedrock_client(region):
+    if region not in _bedrock_clients:
+        # Imported here so boto3 stays out of the handler's import time
+        import boto3
+        from botocore.config import Config
+
+        client = boto3.client(
+            "bedrock-runtime", region_name=region, config=Config(**BEDROCK_CONFIG)
+        )
+        client.meta.events.register("before-send.bedrock-runtime", time_send)
+        client.meta.events.register("response-received.bedrock-runtime", time_headers)
+        _bedrock_clients[region] = client
+
+        # A new client has no open connection, its first request connects
+        timings["new_client"] = True
+
+    return _bedrock_clients[region]
+
+
+def get_model(model_class, model_id, region=None, **params):
+    """
+    LangChain Bedrock model cached on (class, model id, region, params), so
+    warm invocations reuse the boto3 client, its credentials and its open
+    connections instead of building them for every question.
+    """
+    region = region or os.environ["BedrockRegion"]
+    key = (model_class.__name__, model_id, region, tuple(sorted(params.items())))
+
+    if key not in _models:
+        started = time.monotonic()
+        _models[key] = model_class(
+            model_id=model_id,
+            region_name=region,
+            client=get_bedrock_client(region),
+            **params,
+        )
+        timings["setup_ms"] = (time.monotonic() - started) * 1000
+
+    return _models[key]
+
@@ -1,18 +1,42 @@
 import os
-import boto3
-import requests
+import time
 from datetime import datetime
-from boto3.dynamodb.types import TypeSerializer
 
-from models.meta import callLlama
-from models.amazon import callTitan
-from models.ai21 import callJurrasic
-from models.cohere import callCommand
-from models.anthropic import callClaude
-from models.mistral_ai import callMistral
+from answers import answer_cache
+from clients import timings
+from ratelimit import rate_limiter
+from registry import get_adapter
 
-serializer = TypeSerializer()
-dynamodb_client = boto3.client("dynamodb")
+_dynamodb_client = None
+
+
+def get_dynamodb_client():
+    global _dynamodb_client
+
+    if _dynamodb_client is None:
+        # Imported here so boto3 stays out of the handler's import time
+        import boto3
+
+        _dynamodb_client = boto3.client("dynamodb")
+
+    return _dynamodb_client
+
+
+def report_latency(model_id, total_ms):
+    # Client setup only happens on the first question of a model per container.
+    # The wait for the response headers includes connecting, which a new
+    # client always does and a warm one only when its connections were closed
+    setup_ms = timings.get("setup_ms", 0)
+    print(
+        {
+            "model": model_id,
+            "client_setup_ms": round(setup_ms),
+            "headers_ms": round(timings.get("headers_ms", 0)),
+            "model_ms": round(total_ms - setup_ms),
+            "client_reused": "setup_ms" not in timings,
+            "new_connection": timings.get("new_client", False),
+        }
+    )
 
 
 def handler(event, context):
@@ -23,26 +47,18 @@ def handler(event, context):
     board = event["Board"]
     model_id = event["Model"]
 
-    if model_id.startswith("amazon"):
-        answer = callTitan(board, model_id, comment)
-
-    elif model_id.startswith("anthropic"):
-        answer = callClaude(board, model_id, comment)
-
-    elif model_id.startswith("ai21"):
-        answer = callJurrasic(board, model_id, comment)
-
-    elif model_id.startswith("cohere"):
-        answer = callCommand(board, model_id, comment)
-
-    elif model_id.startswith("meta"):
-        answer = callLlama(board, model_id, comment)
-
-    elif model_id.startswith("mistral"):
-        answer = callMistral(board, model_id, comment)
-
-    else:
-        raise Exception(f"model_id not supported {model_id}")
+    timings.clear()
+    started = time.monotonic()
+    answer = answer_cache.get_or_answer(
+        session_id,
+        model_id,
+        board,
+        comment,
+        lambda: rate_limiter.call(
+            model_id, get_adapter(model_id), board, model_id, comment
+        ),
+    )
+    report_latency(model_id, (time.monotonic() - started) * 1000)
 
     question_obj = {
         "SessionID": session_id,
@@ -50,9 +66,9 @@ def handler(event, context):
         "Comment": comment,
         "Author": author,
     }
-    dynamodb_client.put_item(
+    get_dynamodb_client().put_item(
         TableName=os.environ["TableName"],
-        Item={k: serializer.serialize(v) for k, v in question_obj.items()},
+        Item={k: {"S": v} for k, v in question_obj.items()},
     )
 
     answer_obj = {
@@ -61,9 +77,9 @@ def handler(event, context):
         "Comment": answer,
         "Author": model_id,
     }
-    dynamodb_client.put_item(
+    get_dynamodb_client().put_item(
         TableName=os.environ["TableName"],
-        Item={k: serializer.serialize(v) for k, v in answer_obj.items()},
+        Item={k: {"S": v} for k, v in answer_obj.items()},
     )
 
     return answer_obj
@@ -1,11 +1,12 @@
-import os
 from langchain.chains import ConversationChain
 from langchain_community.llms import Bedrock
 from langchain.memory import ConversationBufferMemory
 
+from clients import get_model
+
 
 def callJurrasic(board, model_id, comment):
-    llm = Bedrock(model_id=model_id, region_name=os.environ["BedrockRegion"])
+    llm = get_model(Bedrock, model_id)
 
     conversation = ConversationChain(
         llm=llm, verbose=True, memory=ConversationBufferMemory()
@@ -1,11 +1,12 @@
-import os
 from langchain.prompts import PromptTemplate
 from langchain_core.messages import HumanMessage
 from langchain_community.chat_models import BedrockChat
 
+from clients import get_model
+
 
 def callTitan(board, model_id, comment):
-    chat = BedrockChat(model_id=model_id, region_name=os.environ["BedrockRegion"])
+    chat = get_model(BedrockChat, model_id)
 
     prompt = """I'm going to give you a Forsyth-Edwards Notation (FEN) of a chess game contained in <fen></fen> XML tags. Then I'm going to ask you a question about the chess game. I'd like you to answer the question in a short response. Here is the Forsyth-Edwards Notation (FEN):
         <fen>{board}</fen>
@@ -32,5 +32,10 @@ const dynamodbUpdateRequest = ({ key, values, condition }) => {
     update.TaskToken = ddb.operations.remove();
   }
 
+  // The game is recorded in MoveHistory, a SanList left by older moves goes
+  if (values.SanList === "") {
+    update.SanList = ddb.operations.remove();
+  }
+
   return ddb.update({ key, update, condition });
 };
@@ -478,16 +478,27 @@ export const createDataSources = ({
       timeout: cdk.Duration.minutes(1),
       initialPolicy: [
         new iam.PolicyStatement({
-          actions: ["bedrock:InvokeModel"],
+          actions: [
+            "bedrock:InvokeModel",
+            "bedrock:InvokeModelWithResponseStream",
+          ],
           resources: ["*"],
         }),
       ],
       layers: [genaiLayer],
       environment: {
         BedrockRegion,
+        GRAPHQL_URL: appSyncApi.graphqlUrl,
+        // Set to "true" to publish answers as comments while they stream
+        StreamAnswers: "false",
+        TableName: ddbTable.tableName,
+        // Set to "table" to page the conversation from the table instead of the event
+        HistorySource: "event",
       },
     }
   );
+  appSyncApi.resources.graphqlApi.grantMutation(commentatorQuestionFunc);
+  ddbTable.grantReadWriteData(commentatorQuestionFunc);
 
   const commentatorQuestion = new appsync.AppsyncFunction(self, fieldName, {
     name: "commentatorQuestion",
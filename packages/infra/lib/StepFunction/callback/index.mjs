@@ -9,7 +9,7 @@ const TableName = process.env.TableName;
 export const handler = async (event) => {
   console.log(event);
   const { SessionID, PlayerOutput, LatestMove, Session } = event.input;
-  const { Move, SanList } = PlayerOutput;
+  const { Move, MoveHistory } = PlayerOutput;
   const { Item } = LatestMove;
   const chess = new Chess(Move);
 
@@ -28,7 +28,7 @@ export const handler = async (event) => {
       Move,
       parseInt(Item.MoveCount.N) + 1,
       checkGameOver(),
-      SanList
+      MoveHistory
     )
   );
 
@@ -61,7 +61,13 @@ export const handler = async (event) => {
   };
 };
 
-const updateLatestMove = (SessionID, Move, MoveCount, GameWinner, SanList) => {
+const updateLatestMove = (
+  SessionID,
+  Move,
+  MoveCount,
+  GameWinner,
+  MoveHistory
+) => {
   return /* GraphQL */ `
   mutation UpdateLatestMove {
     updateLatestMove(input: { 
@@ -71,9 +77,10 @@ const updateLatestMove = (SessionID, Move, MoveCount, GameWinner, SanList) => {
       SfnExecutionId: "",
       SuggestedMove: "",
       TaskToken: "",
-      SanList: "${SanList}"
+      SanList: "",
       MoveCount: ${MoveCount}
       ${GameWinner ? `, GameWinner: "${GameWinner}"` : ""} 
+      ${MoveHistory ? `, MoveHistory: "${MoveHistory}"` : ""}
     }) {
       SessionID 
     }
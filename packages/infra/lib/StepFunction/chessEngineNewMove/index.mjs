@@ -1,10 +1,10 @@
 import chess from "js-chess-engine";
 import { Chess } from "chess.js";
+import { nextMoveHistory } from "./gamerecord.mjs";
 
 export const handler = async (event) => {
   const { SessionID, LatestMove, Session } = event;
   const { Item } = LatestMove;
-  const SanList = Item.SanList?.S ? Item.SanList.S : "";
 
   // Get the Current Move
   const modelId =
@@ -25,13 +25,13 @@ export const handler = async (event) => {
     to: to.toLowerCase(),
   });
 
-  const NextSanList = `${SanList}${parseInt(Item.MoveCount.N) + 1}. ${san} `;
+  const MoveHistory = nextMoveHistory(Item, san);
 
   return {
     SessionID,
     Action: "MOVE",
     LatestMove,
     Session,
-    PlayerOutput: { Move: newFen, SanList: NextSanList },
+    PlayerOutput: { Move: newFen, MoveHistory },
   };
 };
@@ -0,0 +1,70 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from metrics import put_metrics
+from ratelimit import MAX_WAIT, is_throttle, rate_limiter
+
+# Calls with a timeout run here so the caller can stop waiting for them
+timeout_executor = ThreadPoolExecutor(max_workers=8)
+
+
+def _invoke(bedrock_client, model_id, body):
+    response = bedrock_client.invoke_model(
+        body=body,
+        modelId=model_id,
+        accept="application/json",
+        contentType="application/json",
+    )
+    return (response, json.loads(response.get("body").read()))
+
+
+def invoke_model(bedrock_client, model_id, body, timeout=None):
+    """
+    invoke_model that also returns the usage of the call: latency and the
+    input/output token counts Bedrock reports in the response headers.
+    With a timeout (seconds) an exception is raised once it has passed; the
+    call itself can't be cancelled and finishes in the background. Calls go
+    through the model's rate limiter and circuit breaker, see ratelimit.py.
+    """
+    # Waiting for the rate limiter comes out of the call's own timeout
+    started = time.monotonic()
+    rate_limiter.acquire(
+        model_id, MAX_WAIT if timeout is None else min(timeout, MAX_WAIT)
+    )
+    if timeout is not None:
+        timeout = max(0, timeout - (time.monotonic() - started))
+
+    started = time.monotonic()
+    try:
+        if timeout is None:
+            response, response_body = _invoke(bedrock_client, model_id, body)
+        else:
+            future = timeout_executor.submit(_invoke, bedrock_client, model_id, body)
+            try:
+                response, response_body = future.result(timeout=timeout)
+            except TimeoutError:
+                raise Exception(f"{model_id} did not answer within {timeout:.1f}s")
+    except Exception as e:
+        rate_limiter.record(model_id, e)
+        if is_throttle(e):
+            put_metrics({"ModelId": model_id}, {"Throttled": (1, "Count")})
+        raise
+    rate_limiter.record(model_id)
+
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+
+    usage = {
+        "latency_ms": round((time.monotonic() - started) * 1000),
+        "input_tokens": int(headers.get("x-amzn-bedrock-input-token-count", 0)),
+        "output_tokens": int(headers.get("x-amzn-bedrock-output-token-count", 0)),
+    }
+    put_metrics(
+        {"ModelId": model_id},
+        {
+            "AttemptLatency": (usage["latency_ms"], "Milliseconds"),
+            "InputTokens": (usage["input_tokens"], "Count"),
+            "OutputTokens": (usage["output_tokens"], "Count"),
+        },
+    )
+
+    return (response_body, usage)
@@ -0,0 +1,46 @@
+import os
+import chess.polyglot
+
+# Polyglot book of the opening_book setting. No book is deployed with the
+# function or its layer, one has to be added and its path set here
+BOOK_PATH = os.environ.get("OpeningBookPath", "")
+
+JUSTIFICATION_TEMPLATE = "%s is an established opening move, carrying %d%% of the opening book weight for this position."
+
+_reader = None
+_missing = False
+
+
+def get_reader():
+    """Polyglot reader kept open across warm invocations, None when no book is deployed"""
+    global _reader, _missing
+
+    if _reader is None and not _missing:
+        if BOOK_PATH and os.path.exists(BOOK_PATH):
+            _reader = chess.polyglot.open_reader(BOOK_PATH)
+        else:
+            # Reported once per container, the moves are played without the book
+            print(f"Opening book enabled but not found at '{BOOK_PATH}'")
+            _missing = True
+
+    return _reader
+
+
+def book_move(board, max_plies):
+    """
+    Weighted random book move for the position as (SAN, justification), or
+    (None, None) when the game is past max_plies or the position is unknown.
+    """
+    reader = get_reader()
+    if reader is None or board.ply() >= max_plies:
+        return (None, None)
+
+    entries = list(reader.find_all(board))
+    if not entries:
+        return (None, None)
+
+    entry = reader.weighted_choice(board)
+    share = 100 * entry.weight / sum(e.weight for e in entries)
+    san = board.san(entry.move)
+
+    return (san, JUSTIFICATION_TEMPLATE % (san, share))
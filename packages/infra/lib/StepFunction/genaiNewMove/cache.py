@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+import boto3
+from collections import OrderedDict
+from deadline import optional_call_config
+
+
+def position_key(model_id, fen):
+    """Cache key of a position, the halfmove clock and fullmove number are dropped"""
+    return f"{model_id}#{' '.join(fen.split(' ')[:4])}"
+
+
+class MoveCache:
+    """
+    Validated moves keyed on (model id, position). The in-process LRU survives
+    warm invocations of one container; when a table name is given, entries are
+    also shared through DynamoDB with a TTL attribute.
+    """
+
+    def __init__(self, max_size=1024, table_name=None, ttl=7 * 24 * 60 * 60):
+        self.max_size = max_size
+        self.table_name = table_name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.table_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dynamodb_client = None
+
+    @property
+    def dynamodb_client(self):
+        if self._dynamodb_client is None:
+            self._dynamodb_client = boto3.client(
+                "dynamodb", config=optional_call_config()
+            )
+        return self._dynamodb_client
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, model_id, fen, shared=True):
+        """The cached entry of the position, the table is only read when shared"""
+        key = position_key(model_id, fen)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.table_name and shared:
+            try:
+                item = self.dynamodb_client.get_item(
+                    TableName=self.table_name, Key={"PositionKey": {"S": key}}
+                ).get("Item")
+            except Exception as e:
+                print(f"Move cache lookup failed: {str(e)}")
+                item = None
+
+            # DynamoDB deletes expired items lazily, so check the TTL here too
+            if item and int(item["ExpiresAt"]["N"]) > time.time():
+                entry = {
+                    "move": item["Move"]["S"],
+                    "justification": item["Justification"]["S"],
+                }
+                self._remember(key, entry)
+                self.hits += 1
+                self.table_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, model_id, fen, move, justification, shared=True):
+        key = position_key(model_id, fen)
+        self._remember(key, {"move": move, "justification": justification})
+
+        if self.table_name and shared:
+            try:
+                self.dynamodb_client.put_item(
+                    TableName=self.table_name,
+                    Item={
+                        "PositionKey": {"S": key},
+                        "Move": {"S": move},
+                        "Justification": {"S": justification or ""},
+                        "ExpiresAt": {"N": str(int(time.time()) + self.ttl)},
+                    },
+                )
+            except Exception as e:
+                print(f"Move cache write failed: {str(e)}")
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "table_hits": self.table_hits,
+            "size": len(self._entries),
+        }
+
+
+move_cache = MoveCache(
+    max_size=int(os.environ.get("MoveCacheSize", 1024)),
+    table_name=os.environ.get("MoveCacheTable"),
+    ttl=int(os.environ.get("MoveCacheTTL", 7 * 24 * 60 * 60)),
+)
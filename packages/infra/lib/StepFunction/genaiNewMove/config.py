@@ -0,0 +1,58 @@
+import os
+import json
+
+# Settings applied to every model unless overridden below
+DEFAULT_MODEL_CONFIG = {
+    # Sequential attempts before the engine fallback takes over
+    "max_attempts": 3,
+    # Let the retry policy pick the attempts and temperatures from the model's
+    # running legal-move rate, up to max_attempts
+    "adaptive_retries": False,
+    # Number of candidate moves requested at the same time, at most the planned
+    # attempts, 1 = sequential retries
+    "candidates": 1,
+    # Seconds to wait for the concurrent candidates before giving up on them
+    "candidate_timeout": 20,
+    # Give the model the numbered legal moves and accept an index or SAN back
+    "legal_moves_prompt": False,
+    # Serve validated moves of already seen positions from the move cache
+    "move_cache": False,
+    # Chance of reusing a cached move rather than asking the model again
+    "cache_reuse_probability": 0.8,
+    # Play from the Polyglot opening book for the first plies of the game. No
+    # book is deployed, add one to a layer and set OpeningBookPath first
+    "opening_book": False,
+    "opening_book_plies": 12,
+    # Search the position with the engine while the model attempts run, so the
+    # engine fallback doesn't have to start from scratch
+    "speculative_engine": False,
+    # Output cap of a move attempt, a move and a 50 word reason fit comfortably
+    "max_tokens": 150,
+    # Generation stops once the reason is closed, the move comes before it
+    "stop_sequences": ["</reason>"],
+}
+
+# Overrides keyed on model id prefix, the longest matching prefix wins
+MODEL_CONFIG = {
+    # Titan only accepts "|" and "User:" as stop sequences
+    "amazon": {"stop_sequences": []},
+    # Llama on Bedrock has no stop sequence parameter
+    "meta": {"stop_sequences": []},
+}
+
+
+def get_model_config(model_id):
+    """
+    Resolve the settings for a model id. The optional ModelConfig environment
+    variable holds a JSON object of the same shape as MODEL_CONFIG and takes
+    precedence, so settings can be changed per deployment.
+    """
+    overrides = dict(MODEL_CONFIG)
+    overrides.update(json.loads(os.environ.get("ModelConfig", "{}")))
+
+    config = dict(DEFAULT_MODEL_CONFIG)
+    for prefix in sorted(overrides, key=len):
+        if model_id.startswith(prefix):
+            config.update(overrides[prefix])
+
+    return config
@@ -0,0 +1,78 @@
+import time
+
+# Time (ms) kept back for each stage that still has to run after the current one
+RETURN_RESERVE = 1000  # returning the state to Step Functions
+PUBLISH_RESERVE = 3000  # publishing the comments
+ENGINE_RESERVE = 5000  # engine fallback, including an engine start
+
+# Model attempts shorter than this (ms) are not worth starting
+MIN_ATTEMPT_TIME = 1000
+
+# Time (ms) an optional call may take: the shared move cache and retry
+# statistics, the transcript and the justification request. The move never
+# depends on them, they are skipped when they don't fit
+OPTIONAL_CALL_TIME = 1000
+
+
+def optional_call_config():
+    """
+    botocore Config of the clients of optional calls: one try that connects
+    and reads within OPTIONAL_CALL_TIME, not the default 60s and retries
+    """
+    from botocore.config import Config
+
+    seconds = OPTIONAL_CALL_TIME / 2 / 1000
+    return Config(
+        connect_timeout=seconds,
+        read_timeout=seconds,
+        retries={"total_max_attempts": 1},
+    )
+
+
+class Deadline:
+    """
+    Point in time the invocation has to return by, taken from the Lambda
+    context. Every stage asks it for its timeout, keeping back the time the
+    stages after it need. Without a context the deadline is unbounded and
+    every timeout is None, as before.
+    """
+
+    def __init__(self, remaining_time=None):
+        self.expires_at = (
+            None if remaining_time is None else time.monotonic() + remaining_time / 1000
+        )
+
+    @classmethod
+    def from_context(cls, context):
+        return cls(context.get_remaining_time_in_millis() if context else None)
+
+    def remaining(self):
+        """Milliseconds left, None when unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0, int((self.expires_at - time.monotonic()) * 1000))
+
+    def timeout(self, reserve=0, cap=None):
+        """Seconds a stage may take so that reserve (ms) is left after it"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+
+        timeout = max(0, (remaining - reserve) / 1000)
+        return timeout if cap is None else min(cap, timeout)
+
+    def attempt_timeout(self, cap=None):
+        """Timeout of a model attempt, the engine fallback must still fit after it"""
+        return self.timeout(ENGINE_RESERVE + PUBLISH_RESERVE + RETURN_RESERVE, cap)
+
+    def allows_attempt(self):
+        timeout = self.attempt_timeout()
+        return timeout is None or timeout * 1000 >= MIN_ATTEMPT_TIME
+
+    def publish_timeout(self, cap=None):
+        return self.timeout(RETURN_RESERVE, cap)
+
+    def allows_optional_call(self, reserve=0):
+        """Whether an optional call fits and still leaves reserve (ms)"""
+        remaining = self.remaining()
+        return remaining is None or remaining - reserve >= OPTIONAL_CALL_TIME
@@ -0,0 +1,210 @@
+import os
+import time
+import queue
+import threading
+import chess
+import chess.engine
+
+# Search never goes below/above these bounds (milliseconds), the depth still
+# ends it sooner in most positions
+MIN_THINK_TIME = 50
+MAX_THINK_TIME = 5000
+
+# Share of the remaining invocation time a single search may use
+THINK_TIME_SHARE = 0.25
+
+# Time kept back for the work that follows the search (milliseconds)
+THINK_TIME_RESERVE = 10000
+
+
+def search_budget(remaining_time):
+    """
+    Think time (ms) for one search, derived from the milliseconds left in the
+    invocation. Returns MAX_THINK_TIME when the remaining time is unknown.
+    """
+    if remaining_time is None:
+        return MAX_THINK_TIME
+
+    budget = int((remaining_time - THINK_TIME_RESERVE) * THINK_TIME_SHARE)
+
+    return max(MIN_THINK_TIME, min(MAX_THINK_TIME, budget))
+
+
+class EngineManager:
+    """
+    Pool of Stockfish processes that lives at module level, so warm Lambda
+    invocations skip the process spawn and NNUE load. Each engine is checked
+    out by one caller at a time; an engine that crashes is dropped and a new
+    one is started in its place.
+    """
+
+    def __init__(self, path, size=1, threads=1, hash_size=64, depth=15):
+        self.path = path
+        self.depth = depth
+        self.parameters = {"Threads": threads, "Hash": hash_size}
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            print(f"Starting Stockfish engine {self.path}")
+            engine = chess.engine.SimpleEngine.popen_uci(self.path)
+        except Exception:
+            self._slots.release()
+            raise
+
+        try:
+            engine.configure(self.parameters)
+            return engine
+        except Exception:
+            engine.quit()
+            self._slots.release()
+            raise
+
+    def _release(self, engine, healthy):
+        if healthy:
+            self._idle.put(engine)
+        else:
+            try:
+                engine.quit()
+            except Exception:
+                pass
+        self._slots.release()
+
+    def close(self):
+        """Quit the idle engines, scripts can't exit while an engine runs"""
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                return
+
+    def limit(self, think_time=None, depth=None):
+        """Up to depth (the manager default when omitted), at most think_time ms"""
+        return chess.engine.Limit(
+            depth=depth or self.depth,
+            time=None if think_time is None else think_time / 1000,
+        )
+
+    def best_move(self, fen, think_time=None, depth=None, skill_level=None):
+        """
+        Best move in UCI for the position. The search stops at depth or after
+        think_time (ms), whichever comes first. skill_level (0-20) weakens the
+        engine for the lower difficulty tiers.
+        """
+        for attempt in range(2):
+            engine = self._checkout()
+            healthy = True
+            try:
+                engine.configure(
+                    {"Skill Level": 20 if skill_level is None else skill_level}
+                )
+                played = engine.play(chess.Board(fen), self.limit(think_time, depth))
+
+                return played.move.uci() if played.move else None
+            except chess.engine.EngineError as e:
+                healthy = False
+                print(f"Stockfish engine failed, restarting: {str(e)}")
+                if attempt:
+                    raise
+            finally:
+                self._release(engine, healthy)
+
+    def speculate(self, fen, think_time):
+        """Start a search of the position in the background, see SpeculativeSearch"""
+        return SpeculativeSearch(self, fen, think_time)
+
+
+class SpeculativeSearch:
+    """
+    Engine search started before it is known to be needed. The engine is
+    checked out on a background thread and analyses the position up to the
+    manager's depth, at most think_time. result() stops the analysis where
+    it got to and returns its best move so far, cancel() stops it without
+    one; both hand the engine back to the pool.
+    """
+
+    def __init__(self, manager, fen, think_time):
+        self.manager = manager
+        self.board = chess.Board(fen)
+        self.limit = manager.limit(think_time)
+        self._engine = None
+        self._analysis = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+        threading.Thread(target=self._start, daemon=True).start()
+
+    def _start(self):
+        try:
+            engine = self.manager._checkout()
+        except Exception as e:
+            print(f"Speculative search failed: {str(e)}")
+            self._started.set()
+            return
+
+        with self._lock:
+            try:
+                if self._stopped:
+                    self.manager._release(engine, True)
+                    return
+
+                engine.configure({"Skill Level": 20})
+                self._analysis = engine.analysis(self.board, self.limit)
+                self._engine = engine
+            except chess.engine.EngineError as e:
+                print(f"Speculative search failed: {str(e)}")
+                self.manager._release(engine, False)
+            finally:
+                self._started.set()
+
+    def _stop(self):
+        """Stop the analysis and release the engine, the best move found or None"""
+        with self._lock:
+            self._stopped = True
+            engine, analysis = self._engine, self._analysis
+            self._engine = self._analysis = None
+
+        if analysis is None:
+            return None
+
+        move = None
+        healthy = True
+        try:
+            analysis.stop()
+            move = analysis.wait().move
+        except chess.engine.EngineError as e:
+            healthy = False
+            print(f"Speculative search failed: {str(e)}")
+            pv = analysis.info.get("pv")
+            move = pv[0] if pv else None
+        finally:
+            self.manager._release(engine, healthy)
+
+        return move.uci() if move else None
+
+    def cancel(self):
+        self._stop()
+
+    def result(self, timeout=None):
+        """
+        Best move in UCI found so far. The analysis is stopped right away, only
+        an engine that is still starting is waited for, at most timeout
+        seconds. None when the search has no move.
+        """
+        self._started.wait(timeout)
+        return self._stop()
+
+
+engine_manager = EngineManager(
+    os.environ.get("StockfishPath", "/opt/bin/stockfish"),
+    size=int(os.environ.get("StockfishPoolSize", 1)),
+    threads=int(os.environ.get("StockfishThreads", 1)),
+    hash_size=int(os.environ.get("StockfishHash", 64)),
+)
@@ -0,0 +1,110 @@
+import chess
+import chess.pgn
+
+# Every move is a 16-bit code (from square, to square and promotion piece)
+# written as three URL-safe base64 characters. A MoveHistory string grows by
+# three characters per ply, so a move is appended without reading the rest;
+# SanList and PGN are derived from it by replaying the codes with python-chess.
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+INDEX = {c: i for i, c in enumerate(ALPHABET)}
+
+# Characters per move: 3 x 6 bits hold the 16-bit code
+WIDTH = 3
+
+PROMOTIONS = [None, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]
+
+
+def encode_move(move):
+    """from (6 bits) | to (6 bits) | promotion (3 bits)"""
+    return (
+        move.from_square | move.to_square << 6 | PROMOTIONS.index(move.promotion) << 12
+    )
+
+
+def decode_move(code):
+    return chess.Move(code & 63, code >> 6 & 63, PROMOTIONS[code >> 12 & 7])
+
+
+def encode(codes):
+    return "".join(
+        ALPHABET[code >> 12 & 63] + ALPHABET[code >> 6 & 63] + ALPHABET[code & 63]
+        for code in codes
+    )
+
+
+def decode(history):
+    history = history or ""
+    if len(history) % WIDTH:
+        raise Exception(f"Invalid move history length {len(history)}")
+
+    return [
+        INDEX[history[i]] << 12 | INDEX[history[i + 1]] << 6 | INDEX[history[i + 2]]
+        for i in range(0, len(history), WIDTH)
+    ]
+
+
+def to_bytes(history):
+    """Packed big-endian 16-bit codes, for binary attributes and files"""
+    return b"".join(code.to_bytes(2, "big") for code in decode(history))
+
+
+def from_bytes(data):
+    return encode(
+        int.from_bytes(data[i : i + 2], "big") for i in range(0, len(data), 2)
+    )
+
+
+def plies(history):
+    return len(history or "") // WIDTH
+
+
+def append(history, move):
+    return (history or "") + encode([encode_move(move)])
+
+
+def moves(history):
+    return [decode_move(code) for code in decode(history)]
+
+
+def to_sans(history, board=None):
+    """SAN of every move, replayed from the starting position"""
+    board = board.copy() if board else chess.Board()
+    sans = []
+    for move in moves(history):
+        if not board.is_legal(move):
+            raise Exception(f"Illegal move {move.uci()} in move history")
+        sans.append(board.san(move))
+        board.push(move)
+
+    return sans
+
+
+def to_san_list(history, board=None):
+    """The SanList string of the game, one number per ply"""
+    return "".join(f"{i + 1}. {san} " for i, san in enumerate(to_sans(history, board)))
+
+
+def from_san_list(san_list, board=None):
+    """MoveHistory of a SanList, the numbers are skipped"""
+    board = board.copy() if board else chess.Board()
+    codes = []
+    for san in (san_list or "").split():
+        if san.endswith("."):
+            continue
+        move = board.parse_san(san)
+        codes.append(encode_move(move))
+        board.push(move)
+
+    return encode(codes)
+
+
+def to_pgn(history, headers=None, board=None):
+    board = board.copy() if board else chess.Board()
+    for move in moves(history):
+        board.push(move)
+
+    game = chess.pgn.Game.from_board(board)
+    for name, value in (headers or {}).items():
+        game.headers[name] = value
+
+    return str(game)
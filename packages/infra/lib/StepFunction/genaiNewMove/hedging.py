@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+import boto3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from metrics import put_metrics
+
+# Percentile of the primary's recent latencies after which the request is hedged
+HEDGE_PERCENTILE = float(os.environ.get("BedrockHedgePercentile", 95))
+
+# Hedge delay (ms) bounds, the upper one is also used until there are enough samples
+MIN_HEDGE_DELAY = int(os.environ.get("BedrockHedgeMinDelay", 500))
+MAX_HEDGE_DELAY = int(os.environ.get("BedrockHedgeMaxDelay", 10000))
+
+# Primary latencies kept per model id, and needed before the percentile is used
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 20
+
+
+class HedgedClient:
+    """
+    bedrock-runtime client that hedges invoke_model across two regions. The
+    request goes to the primary region first; if it hasn't answered once the
+    primary's recent latency percentile has passed, the same request goes to
+    the secondary region and the first answer wins. Only slow calls are
+    sent twice, at most 100 - HEDGE_PERCENTILE percent of them.
+    """
+
+    def __init__(self, primary, secondary, percentile=HEDGE_PERCENTILE):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8)
+
+    def hedge_delay(self, model_id):
+        """Milliseconds to wait for the primary before hedging"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(model_id, []))
+
+        if len(latencies) < MIN_SAMPLES:
+            return MAX_HEDGE_DELAY
+
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(MIN_HEDGE_DELAY, min(MAX_HEDGE_DELAY, latencies[index]))
+
+    def _timed(self, client, model_id, kwargs, record):
+        started = time.monotonic()
+        response = client.invoke_model(**kwargs)
+
+        if record:
+            latency = (time.monotonic() - started) * 1000
+            with self._lock:
+                self._latencies.setdefault(
+                    model_id, deque(maxlen=LATENCY_WINDOW)
+                ).append(latency)
+
+        return response
+
+    def invoke_model(self, **kwargs):
+        model_id = kwargs["modelId"]
+        delay = self.hedge_delay(model_id)
+
+        primary = self._executor.submit(
+            self._timed, self.primary, model_id, kwargs, True
+        )
+        done, _ = wait([primary], timeout=delay / 1000)
+        if done:
+            return primary.result()
+
+        print(f"{model_id} primary region slower than {delay:.0f}ms, hedging")
+        secondary = self._executor.submit(
+            self._timed, self.secondary, model_id, kwargs, False
+        )
+        pending = {primary: "primary", secondary: "secondary"}
+
+        # The first successful answer wins, an error only counts once both failed
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                winner = pending.pop(future)
+                if future.exception() is None or not pending:
+                    print(f"{model_id} hedged request won by the {winner} region")
+                    put_metrics(
+                        {"ModelId": model_id},
+                        {
+                            "Hedged": (1, "Count"),
+                            "HedgeWon": (int(winner == "secondary"), "Count"),
+                        },
+                    )
+                    return future.result()
+
+
+def hedged_client(primary):
+    """Wrap the primary client when a secondary region is configured"""
+    region = os.environ.get("BedrockHedgeRegion")
+    if not region:
+        return primary
+
+    return HedgedClient(primary, boto3.client("bedrock-runtime", region_name=region))
@@ -1,36 +1,74 @@
 import os
 import json
+import time
 import chess
 import boto3
 import random
-from stockfish import Stockfish
-from utils import send_to_appsync
-from models.meta import callLlama
-from models.amazon import callTitan
-from models.ai21 import callJurrasic
-from models.cohere import callCommand
-from models.anthropic import callClaude
-from models.mistral_ai import callMistral
-
-bedrock_client = boto3.client(
-    "bedrock-runtime", region_name=os.environ["BedrockRegion"]
+import gamerecord
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from utils import publisher
+from bedrock import invoke_model
+from book import book_move
+from cache import move_cache
+from config import get_model_config
+from deadline import (
+    Deadline,
+    ENGINE_RESERVE,
+    PUBLISH_RESERVE,
+    RETURN_RESERVE,
+    optional_call_config,
 )
+from engine import engine_manager, search_budget
+from hedging import hedged_client
+from metrics import put_metrics, start_invocation, verbose
+from policy import retry_policy
+from prompts import list_legal_moves
+from ratelimit import rate_limiter
+from registry import get_adapter
+from transcripts import (
+    compact_attempts,
+    mark_attempt,
+    mark_failure,
+    offload_transcript,
+)
+
+_bedrock_client = None
+_lambda_client = None
+
+
+def get_bedrock_client():
+    global _bedrock_client
+
+    if _bedrock_client is None:
+        _bedrock_client = hedged_client(
+            boto3.client("bedrock-runtime", region_name=os.environ["BedrockRegion"])
+        )
+
+    return _bedrock_client
+
+
+def get_lambda_client():
+    global _lambda_client
+
+    if _lambda_client is None:
+        _lambda_client = boto3.client("lambda", config=optional_call_config())
+
+    return _lambda_client
 
 
 def handler(event, context):
-    print(event)
+    start_invocation()
+    deadline = Deadline.from_context(context)
+    verbose(event)
     latest_move = event["LatestMove"]["Item"]
     current_fen = latest_move["Move"]["S"]
     current_board = chess.Board(current_fen)
-    print(current_board, "STARTING BOARD")
+    verbose(current_board, "STARTING BOARD")
 
-    # Parse input SanList
-    san_list = latest_move["SanList"]["S"] if "SanList" in latest_move else None
-    print(san_list, "SAN LIST")
+    move_history = game_history(latest_move)
 
     # True = White
     # False = Black
-    print(current_board.turn)
     turn = current_board.turn
     model_id = (
         event["Session"]["Item"]["WhiteID"]["S"]
@@ -38,98 +76,414 @@ def handler(event, context):
         else event["Session"]["Item"]["BlackID"]["S"]
     )
 
-    print(model_id)
+    started = time.monotonic()
     next_move, justification, message_attempts = predict_next_move(
-        model_id, san_list, current_board
+        model_id, current_board, deadline
     )
 
-    print("Next Move:\t" + next_move)
-    print("Justification:\t" + justification)
+    report_move(model_id, (time.monotonic() - started) * 1000, message_attempts)
+    print(f"{model_id} next move:\t" + next_move)
+    author = f'{model_id}#{"w" if turn else "b"}'
 
-    send_to_appsync(
-        event["SessionID"], justification, f'{model_id}#{"w" if turn else "b"}'
-    )
-    print(current_board, "END BOARD")
+    # An engine move is justified by another invocation, the move doesn't wait for it
+    if isinstance(justification, dict):
+        request_justification(
+            event["SessionID"], author, **justification, deadline=deadline
+        )
+    else:
+        verbose("Justification:\t" + justification)
+        publisher.publish(event["SessionID"], justification, author, deadline)
+
+    verbose(current_board, "END BOARD")
 
     next_move_num = int(event["LatestMove"]["Item"]["MoveCount"]["N"]) + 1
-    next_san_list = f"{san_list if san_list else ''}{str(next_move_num)}. {next_move} "
+    next_move_history = (
+        gamerecord.append(move_history, current_board.peek())
+        if move_history is not None
+        else None
+    )
+
+    # Only a pointer to the full prompts and responses stays in the state
+    transcript = offload_transcript(
+        event["SessionID"],
+        next_move_num,
+        model_id,
+        message_attempts,
+        deadline,
+        PUBLISH_RESERVE + RETURN_RESERVE,
+    )
+
+    publisher.flush(timeout=deadline.publish_timeout())
 
     return {
-        "SanList": next_san_list,
+        "MoveHistory": next_move_history,
         "Move": current_board.fen(),
-        "Messages": message_attempts,
+        "Messages": compact_attempts(model_id, message_attempts),
+        "Transcript": transcript,
     }
 
 
-def predict_next_move(model_id, san_list, board):
-    message_attempts = []
-    accept = "application/json"
-    contentType = "application/json"
+def game_history(latest_move):
+    """
+    MoveHistory of the game so far. Games started before MoveHistory was
+    written only have a SanList, their history is rebuilt from it once.
+    None when neither holds the game: the move is still played from the
+    board, only the record isn't kept.
+    """
+    move_count = int(latest_move["MoveCount"]["N"])
+    move_history = latest_move.get("MoveHistory", {}).get("S", "")
+    if gamerecord.plies(move_history) == move_count:
+        return move_history
 
-    for tries in range(3):
-        if model_id.startswith("amazon"):
-            next_move, justification, message_attempts = callTitan(
-                board, model_id, bedrock_client, tries, message_attempts
-            )
+    try:
+        move_history = gamerecord.from_san_list(latest_move.get("SanList", {}).get("S"))
+    except Exception as e:
+        print(f"Move history not rebuilt: {str(e)}")
+        return None
 
-        elif model_id.startswith("anthropic"):
-            next_move, justification, message_attempts = callClaude(
-                board, model_id, bedrock_client, tries, message_attempts
-            )
+    if gamerecord.plies(move_history) != move_count:
+        print(
+            f"Move history has {gamerecord.plies(move_history)} of {move_count} moves"
+        )
+        return None
 
-        elif model_id.startswith("ai21"):
-            next_move, justification, message_attempts = callJurrasic(
-                board, model_id, bedrock_client, tries, message_attempts
-            )
+    return move_history
 
-        elif model_id.startswith("cohere"):
-            next_move, justification, message_attempts = callCommand(
-                board, model_id, bedrock_client, tries, message_attempts
-            )
 
-        elif model_id.startswith("meta"):
-            next_move, justification, message_attempts = callLlama(
-                board, model_id, bedrock_client, tries, message_attempts
-            )
+def report_move(model_id, latency_ms, message_attempts):
+    """
+    One metrics line per move: where the move came from and how many model
+    attempts it took. Latency and tokens per attempt are reported by invoke_model.
+    """
+    attempts = [a for a in message_attempts if "source" not in a]
+    source = (
+        message_attempts[-1].get("source", "model") if message_attempts else "model"
+    )
+
+    put_metrics(
+        {"ModelId": model_id},
+        {
+            "MoveLatency": (round(latency_ms), "Milliseconds"),
+            "Attempts": (len(attempts), "Count"),
+            "Fallback": (int(source == "engine"), "Count"),
+        },
+        {"Source": source},
+    )
+
+
+def record_attempt(model_id, message_attempts, tries, move, legal):
+    attempt = mark_attempt(message_attempts, tries, move, legal)
+    retry_policy.record(model_id, legal, attempt and attempt.get("latency_ms"))
+    put_metrics({"ModelId": model_id}, {"LegalMove": (int(legal), "Count")})
+
+
+def record_failure(model_id, message_attempts, tries, error):
+    """
+    An attempt that got no answer: a timeout, a throttle or an open breaker.
+    It says nothing about the model's moves, so it is kept out of the
+    legal-move rate and the LegalMove metric.
+    """
+    mark_failure(message_attempts, tries, error)
+    put_metrics({"ModelId": model_id}, {"AttemptErrors": (1, "Count")})
+
+
+def request_justification(session_id, author, move, fen, deadline=None):
+    """
+    Have the JustificationFunction comment on an engine move. It is invoked
+    asynchronously, the move is returned without waiting for the comment.
+    """
+    function_name = os.environ.get("JustificationFunction")
+    if not function_name:
+        print("No JustificationFunction configured, engine move not commented")
+        return
+    if deadline and not deadline.allows_optional_call(PUBLISH_RESERVE + RETURN_RESERVE):
+        print(f"Justification not requested, {deadline.remaining()}ms left")
+        return
+
+    try:
+        get_lambda_client().invoke(
+            FunctionName=function_name,
+            InvocationType="Event",
+            Payload=json.dumps(
+                {"SessionID": session_id, "Author": author, "Move": move, "Fen": fen}
+            ),
+        )
+    except Exception as e:
+        print(f"Justification not requested: {str(e)}")
+
+
+def justification_handler(event, context):
+    """Handler of the JustificationFunction, see request_justification"""
+    start_invocation()
+    deadline = Deadline.from_context(context)
+    verbose(event)
+
+    justification = justify_move(event["Move"], event["Fen"], deadline)
+    verbose("Justification:\t" + justification)
+    publisher.publish(event["SessionID"], justification, event["Author"], deadline)
+
+    publisher.flush(timeout=deadline.publish_timeout())
+
+
+def sample_candidates(
+    call_model,
+    model_id,
+    board,
+    model_config,
+    message_attempts,
+    legal_moves,
+    temperatures,
+    deadline,
+):
+    """
+    Request several candidate moves at once and keep the first legal one.
+    There are no more candidates than attempts the retry policy planned, each
+    at the temperature of its attempt, with its own copy of the board and its
+    own attempt records. Only the records of finished candidates are kept,
+    candidates still running once a legal move is found are ignored.
+    """
+    if not deadline.allows_attempt():
+        print(f"No time left for candidates, {deadline.remaining()}ms left")
+        return (None, None)
+
+    candidates = min(model_config["candidates"], len(temperatures))
+    executor = ThreadPoolExecutor(max_workers=candidates)
+    attempts_of = {}
+    for tries, temperature in enumerate(temperatures[:candidates]):
+        attempts = []
+        future = executor.submit(
+            call_model,
+            board.copy(),
+            model_id,
+            get_bedrock_client(),
+            tries,
+            attempts,
+            legal_moves,
+            temperature,
+            deadline,
+        )
+        attempts_of[future] = (tries, attempts)
 
-        elif model_id.startswith("mistral"):
-            next_move, justification, message_attempts = callMistral(
-                board, model_id, bedrock_client, tries, message_attempts
+    pending = set(attempts_of)
+    timeout = deadline.attempt_timeout(cap=model_config["candidate_timeout"])
+    candidate_deadline = time.monotonic() + timeout
+
+    try:
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(candidate_deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED,
             )
+            if not done:
+                print(f"No legal candidate within {timeout:.1f}s")
+                break
+
+            for future in done:
+                tries, attempts = attempts_of[future]
+                message_attempts.extend(attempts)
+
+                try:
+                    next_move, justification, _ = future.result()
+                except Exception as e:
+                    record_failure(model_id, message_attempts, tries, e)
+                    print(f"Candidate failed: {str(e)}")
+                    continue
+
+                try:
+                    verbose(f"Validating move: {next_move}")
+                    board.push_san(next_move)
+                    record_attempt(model_id, message_attempts, tries, next_move, True)
+
+                    return (next_move, justification)
+                except Exception as e:
+                    record_attempt(model_id, message_attempts, tries, next_move, False)
+                    print(f"Candidate not valid: {str(e)}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        else:
-            raise Exception(f"model_id not supported {model_id}")
+    return (None, None)
+
+
+def retry_moves(
+    call_model, model_id, board, message_attempts, legal_moves, temperatures, deadline
+):
+    """
+    One attempt per temperature, None keeps the adapter's own schedule. No
+    attempt is started once the engine fallback would no longer fit before
+    the deadline.
+    """
+    for tries, temperature in enumerate(temperatures):
+        if not deadline.allows_attempt():
+            print(f"No time left for attempt {tries+1}, {deadline.remaining()}ms left")
+            break
+
+        try:
+            next_move, justification, message_attempts = call_model(
+                board,
+                model_id,
+                get_bedrock_client(),
+                tries,
+                message_attempts,
+                legal_moves,
+                temperature,
+                deadline,
+            )
+        except Exception as e:
+            record_failure(model_id, message_attempts, tries, e)
+            print(f"Attempt failed: {str(e)}")
+            continue
 
         try:
-            print(f"Validating move: {next_move}")
+            verbose(f"Validating move: {next_move}")
             board.push_san(next_move)
-            print(f"The move is valid after {tries+1} tries")
+            record_attempt(model_id, message_attempts, tries, next_move, True)
 
-            return (next_move, justification, message_attempts)
+            return (next_move, justification)
         except Exception as e:
+            record_attempt(model_id, message_attempts, tries, next_move, False)
             print(f"Move not valid: {next_move}")
             print(f"Exception Generated: {str(e)}")
 
-    # If number of tries is > 3 - then generate a random move
+    return (None, None)
+
+
+def predict_next_move(model_id, board, deadline=None, justify=True):
+    """
+    Next move of the model, played on the board. Returns the move in SAN,
+    its justification and the attempt records. An engine move has no
+    justification yet: when justify is set the move and position to
+    justify are returned instead, see request_justification.
+    """
+    deadline = deadline or Deadline()
+    message_attempts = []
+    call_model = get_adapter(model_id)
+    model_config = get_model_config(model_id)
+    fen = board.fen()
+
+    if model_config["opening_book"]:
+        next_move, justification = book_move(board, model_config["opening_book_plies"])
+        if next_move:
+            verbose(f"Opening book move: {next_move}")
+            board.push_san(next_move)
+            message_attempts.append({"source": "book", "move": next_move})
+
+            return (next_move, justification, message_attempts)
+
+    # The shared cache and statistics are skipped when they would eat into
+    # the time the engine fallback and publishing need
+    optional_reserve = ENGINE_RESERVE + PUBLISH_RESERVE + RETURN_RESERVE
+
+    if model_config["move_cache"]:
+        cached = move_cache.get(
+            model_id, fen, shared=deadline.allows_optional_call(optional_reserve)
+        )
+        verbose(f"Move cache: {move_cache.stats()}")
+
+        # Sometimes regenerate a cached position so games don't become fully deterministic
+        if cached and random.random() < model_config["cache_reuse_probability"]:
+            board.push_san(cached["move"])
+            message_attempts.append({"source": "cache", "move": cached["move"]})
+
+            return (cached["move"], cached["justification"], message_attempts)
+
+    legal_moves = (
+        list_legal_moves(board) if model_config["legal_moves_prompt"] else None
+    )
+
+    if not rate_limiter.available(model_id):
+        # Throttled or failing model, don't spend the move on it until it recovers
+        print(f"{model_id} circuit breaker is open, using the engine")
+        temperatures = []
+    elif model_config["adaptive_retries"]:
+        temperatures = retry_policy.plan(
+            model_id, model_config["max_attempts"], deadline.remaining()
+        )
+        verbose(f"Retry policy: {retry_policy.stats(model_id)} -> {temperatures}")
+    else:
+        temperatures = [None] * model_config["max_attempts"]
+
+    # The engine searches while the model attempts run, in case they all fail
+    speculation = None
+    if temperatures and model_config["speculative_engine"]:
+        speculation = engine_manager.speculate(fen, search_budget(deadline.remaining()))
+
+    if not temperatures:
+        verbose(f"{model_id} goes straight to the engine")
+        next_move, justification = (None, None)
+    elif model_config["candidates"] > 1:
+        next_move, justification = sample_candidates(
+            call_model,
+            model_id,
+            board,
+            model_config,
+            message_attempts,
+            legal_moves,
+            temperatures,
+            deadline,
+        )
+    else:
+        next_move, justification = retry_moves(
+            call_model,
+            model_id,
+            board,
+            message_attempts,
+            legal_moves,
+            temperatures,
+            deadline,
+        )
+    if deadline.allows_optional_call(optional_reserve):
+        retry_policy.save(model_id)
+
+    if next_move:
+        if speculation:
+            speculation.cancel()
+        if model_config["move_cache"]:
+            move_cache.put(
+                model_id,
+                fen,
+                next_move,
+                justification,
+                shared=deadline.allows_optional_call(PUBLISH_RESERVE + RETURN_RESERVE),
+            )
+
+        return (next_move, justification, message_attempts)
+
+    # If no attempt made a legal move - then let the engine make one
     print("Looks like I need a little help... lets make a random")
 
-    stockfish = Stockfish("/opt/bin/stockfish")
-    stockfish.set_fen_position(board.fen())
-    best_move = stockfish.get_best_move()
+    best_move = None
+    if speculation:
+        # Whatever the speculative search has found by now, it isn't waited for
+        best_move = speculation.result(timeout=deadline.attempt_timeout())
+        verbose(f"Speculative search: {best_move}")
+
+    if best_move is None:
+        best_move = engine_manager.best_move(
+            board.fen(), think_time=search_budget(deadline.remaining())
+        )
     stockfish_move = board.san(chess.Move.from_uci(best_move))
 
     print(f"Stockfish: {stockfish_move}")
     board.push_san(stockfish_move)
+    message_attempts.append({"source": "engine", "move": stockfish_move})
 
+    # The commentary is generated by another invocation, see handler
+    justification = {"move": stockfish_move, "fen": board.fen()} if justify else None
+
+    return (stockfish_move, justification, message_attempts)
+
+
+def justify_move(move, fen, deadline=None):
     system_prompt = (
         "You are a commentator on the game of chess. You provide short justification as to why certain moves are logical to win the game. The current Forsyth-Edwards Notation (FEN) of the chess board is %s."
-        % board.fen()
+        % fen
     )
 
     user_message = {
         "role": "user",
         "content": "Generate a short justification, 50 words or less, as to why the following Standard Algebraic Notation (SAN) move, %s, in the game of chess is a smart move when the current state of the board describe by the following Forsyth-Edwards Notation (FEN), %s"
-        % (stockfish_move, board.fen()),
+        % (move, fen),
     }
 
     messages = [user_message]
@@ -143,14 +497,16 @@ def predict_next_move(model_id, san_list, board):
         }
     )
 
-    response = bedrock_client.invoke_model(
-        body=body, modelId="anthropic.claude-3-sonnet-20240229-v1:0"
+    response_body, _ = invoke_model(
+        get_bedrock_client(),
+        "anthropic.claude-3-sonnet-20240229-v1:0",
+        body,
+        timeout=(
+            deadline.timeout(PUBLISH_RESERVE + RETURN_RESERVE) if deadline else None
+        ),
     )
-    response_body = json.loads(response.get("body").read())
     justification = (
         response_body["content"][0]["text"].replace("\n", "").replace('"', "")
     )
 
-    print(f"Stockfish move generated after {tries+1} to make a legal move.")
-
-    return (stockfish_move, justification, message_attempts)
+    return justification
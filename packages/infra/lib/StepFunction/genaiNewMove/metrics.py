@@ -0,0 +1,53 @@
+import os
+import json
+import time
+import random
+
+NAMESPACE = os.environ.get("MetricsNamespace", "GenAIChess")
+
+# DEBUG dumps every event, board, prompt and response body
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Share of invocations that dump verbose output at the INFO level
+VERBOSE_SAMPLE_RATE = float(os.environ.get("VerboseLogSampleRate", 0.01))
+
+_sampled = False
+
+
+def start_invocation():
+    """Decide once per invocation whether its verbose output is logged"""
+    global _sampled
+
+    _sampled = LOG_LEVEL == "DEBUG" or random.random() < VERBOSE_SAMPLE_RATE
+
+
+def verbose(*args):
+    if _sampled:
+        print(*args)
+
+
+def put_metrics(dimensions, metrics, properties=None):
+    """
+    Write one CloudWatch Embedded Metric Format line to stdout. CloudWatch
+    extracts the metrics from the log line, offline it is a plain JSON line.
+    metrics maps a metric name to a (value, unit) tuple.
+    """
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [list(dimensions)],
+                    "Metrics": [
+                        {"Name": name, "Unit": unit}
+                        for name, (_, unit) in metrics.items()
+                    ],
+                }
+            ],
+        },
+        **dimensions,
+        **{name: value for name, (value, _) in metrics.items()},
+        **(properties or {}),
+    }
+    print(json.dumps(record))
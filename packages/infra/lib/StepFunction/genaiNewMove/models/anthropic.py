@@ -1,13 +1,33 @@
 import json
+from bedrock import invoke_model
+from config import get_model_config
+from metrics import verbose
+from parsing import parse_move
+from prompts import legal_moves_prompt
 
 
-def callClaude(board, model_id, bedrock_client, tries, message_attempts):
+def callClaude(
+    board,
+    model_id,
+    bedrock_client,
+    tries,
+    message_attempts,
+    legal_moves=None,
+    temperature_override=None,
+    deadline=None,
+):
+    model_config = get_model_config(model_id)
+
     # Increase temperature if the previous generated move was not a legal move
     if tries == 0:
         temperature = 0.7
     else:
         temperature = 0.7 + 0.7 ** (10 / tries)
 
+    # The retry policy can pick the temperature instead
+    if temperature_override is not None:
+        temperature = temperature_override
+
     system_prompt = (
         "You are chess player playing a game of chess. The current Forsyth-Edwards Notation (FEN) of the chess board is %s."
         % board.fen()
@@ -18,41 +38,50 @@ def callClaude(board, model_id, bedrock_client, tries, message_attempts):
         "content": "Generate the next valid move in Standard Algebraic Notation (SAN) to win the game of chess. Provide the move in <move></move> XML tags and provide a short justification, 50 words or less, as to why you believe this is the best move in <reason></reason> XML tags.",
     }
 
+    if legal_moves:
+        user_message["content"] += legal_moves_prompt(legal_moves)
+
     messages = [user_message]
 
-    body = json.dumps(
-        {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 200,
-            "system": system_prompt,
-            "messages": messages,
-        }
-    )
+    request = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": model_config["max_tokens"],
+        "stop_sequences": model_config["stop_sequences"],
+        "system": system_prompt,
+        "messages": messages,
+    }
+    # Claude keeps its default temperature unless the retry policy picked one
+    if temperature_override is not None:
+        request["temperature"] = temperature
 
-    response = bedrock_client.invoke_model(body=body, modelId=model_id)
-    response_body = json.loads(response.get("body").read())
+    body = json.dumps(request)
+
+    response_body, usage = invoke_model(
+        bedrock_client,
+        model_id,
+        body,
+        timeout=deadline.attempt_timeout() if deadline else None,
+    )
 
-    print(f"{model_id} attempt {tries}")
-    print(system_prompt)
-    print(messages)
-    print(response_body)
+    verbose(f"{model_id} attempt {tries}")
+    verbose(system_prompt)
+    verbose(messages)
+    verbose(response_body)
 
     message_attempts.append(
         {
+            "attempt": tries,
             "system_prompt": system_prompt,
             "messages": messages,
             "response_body": response_body,
+            **usage,
         }
     )
 
     try:
-        next_move = (
-            response_body["content"][0]["text"]
-            .split("<move>")[1]
-            .split("</move>")[0]
-            .replace("\n", "")
-        )
-        justification = response_body["content"][0]["text"].replace("\n", "")
+        text = response_body["content"][0]["text"]
+        next_move = parse_move(text, board, legal_moves)
+        justification = text.replace("\n", "")
     except:
         next_move = None
         justification = None
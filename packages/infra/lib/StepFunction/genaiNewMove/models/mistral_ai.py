@@ -1,49 +1,75 @@
 import json
+from bedrock import invoke_model
+from config import get_model_config
+from metrics import verbose
+from parsing import parse_move
+from prompts import legal_moves_prompt
 
 
-def callMistral(board, model_id, bedrock_client, tries, message_attempts):
+def callMistral(
+    board,
+    model_id,
+    bedrock_client,
+    tries,
+    message_attempts,
+    legal_moves=None,
+    temperature_override=None,
+    deadline=None,
+):
+    model_config = get_model_config(model_id)
+
     # Increase temperature if the previous generated move was not a legal move
     if tries == 0:
         temperature = 0.6
     else:
         temperature = 0.6 + 0.7 ** (10 / tries)
 
+    # The retry policy can pick the temperature instead
+    if temperature_override is not None:
+        temperature = temperature_override
+
     prompt = (
         "You are chess player playing a game of chess. The current Forsyth-Edwards Notation (FEN) of the chess board is %s. Generate the next valid move in Standard Algebraic Notation (SAN) to win the game of chess. Provide the move in <move></move> XML tags and provide a short justification, 50 words or less, as to why you believe this is the best move in <reason></reason> XML tags."
         % board.fen()
     )
 
+    if legal_moves:
+        prompt += legal_moves_prompt(legal_moves)
+
     body = json.dumps(
         {
             "prompt": prompt,
-            "max_tokens": 400,
+            "max_tokens": model_config["max_tokens"],
+            "stop": model_config["stop_sequences"],
             "temperature": temperature,
             "top_p": 0.7,
             "top_k": 50,
         }
     )
 
-    response = bedrock_client.invoke_model(body=body, modelId=model_id)
-    response_body = json.loads(response.get("body").read())
+    response_body, usage = invoke_model(
+        bedrock_client,
+        model_id,
+        body,
+        timeout=deadline.attempt_timeout() if deadline else None,
+    )
 
-    print(f"{model_id} attempt {tries}")
-    print(response_body)
+    verbose(f"{model_id} attempt {tries}")
+    verbose(response_body)
 
     message_attempts.append(
         {
+            "attempt": tries,
             "prompt": prompt,
             "response_body": response_body,
+            **usage,
         }
     )
 
     try:
-        next_move = (
-            response_body["outputs"][0]["text"]
-            .split("<move>")[1]
-            .split("</move>")[0]
-            .strip()
-        )
-        justification = response_body["outputs"][0]["text"].replace("\n", "")
+        text = response_body["outputs"][0]["text"]
+        next_move = parse_move(text, board, legal_moves)
+        justification = text.replace("\n", "")
     except:
         next_move = None
         justification = None
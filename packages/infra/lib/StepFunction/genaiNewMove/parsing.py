@@ -0,0 +1,111 @@
+import re
+
+# Contents of every <move> tag, an unclosed tag runs to the next tag or line end
+_move_tag = re.compile(r"<move>\s*(.*?)\s*(?:</move>|<|\n|$)", re.IGNORECASE)
+
+# Anything that looks like a move: castling, SAN, LAN or UCI, with annotations
+_move_token = re.compile(
+    r"(?<![\w-])("
+    r"[O0o]-[O0o](?:-[O0o])?"
+    r"|[KQRBNPkqrbnp]?[a-h]?[1-8]?[-x:]?[a-h][1-8](?:=?[QRBNqrbn])?"
+    r")(?:[+#]|[!?]{1,2}|\s*e\.p\.)*(?![\w-])"
+)
+
+_castling = re.compile(r"^[O0o]-[O0o]")
+
+# Formatting models put around moves
+_markup = re.compile(r"[*`\"'\[\](){}]")
+
+# Move numbers before a move, "12." or "12..."
+_move_number = re.compile(r"\b\d+\s*\.+")
+
+# A token that is only a square, a pawn push in SAN
+_square = re.compile(r"^[a-h][1-8]$")
+
+# A piece named up to three words before the end of a span, "Knight to",
+# "the bishop takes": a square after it is that piece's destination
+_piece_word = re.compile(
+    r"\b(?:king|queen|rook|bishop|knight)s?\b(?:\s+[\w-]+){0,3}\s+$", re.IGNORECASE
+)
+
+# A lone number, the index of a move in the legal moves prompt
+_index = re.compile(r"^\s*(\d+)\s*\.?\s*$")
+
+
+def tokens(span):
+    """
+    Move-like tokens of a span, longest first: "Knight to f3 (Nf3)" is Nf3.
+    A bare square right after a piece word is that piece's destination, in
+    "Knight to f3" it is not the pawn move f3, so it is left out.
+    """
+    cleaned = _move_number.sub(" ", _markup.sub(" ", span)).strip()
+    found = [
+        match.group(1)
+        for match in _move_token.finditer(cleaned)
+        if not (
+            _square.match(match.group(1))
+            and _piece_word.search(cleaned[: match.start()])
+        )
+    ]
+
+    return sorted(found, key=len, reverse=True)
+
+
+def candidates(text):
+    """
+    Move-like tokens of a response, in order: those in <move> tags first;
+    only without any tag is the whole text searched.
+    """
+    if not text:
+        return []
+
+    tagged = _move_tag.findall(text)
+    if not tagged:
+        return tokens(text)
+
+    # The whole tag first, it may hold a number or a move the tokens split up
+    return [token for span in tagged for token in [span] + tokens(span) if token]
+
+
+def normalize(token, board):
+    """The legal move a token stands for in the position, None if there is none"""
+    token = token.replace(":", "x")
+    if _castling.match(token):
+        token = token.upper().replace("0", "O")
+
+    # Lowercase piece letters, b is tried as a pawn on the b-file first, and
+    # pawn moves with the P SAN leaves out, "Pe4"
+    spellings = [token]
+    if len(token) > 2 and token[0] in "kqrbn":
+        spellings.append(token[0].upper() + token[1:])
+    if len(token) > 2 and token[0] in "Pp":
+        spellings.append(token[1:])
+
+    for spelling in spellings:
+        try:
+            return board.parse_san(spelling)
+        except ValueError:
+            continue
+
+    return None
+
+
+def parse_move(text, board, legal_moves=None):
+    """
+    The first candidate of a response that is a legal move in the position,
+    in SAN. Without one the raw content of the first move tag is returned so
+    the failed attempt still shows what the model answered, or None.
+    """
+    for token in candidates(text):
+        index = _index.match(token)
+        if index and legal_moves:
+            if 1 <= int(index.group(1)) <= len(legal_moves):
+                return legal_moves[int(index.group(1)) - 1]
+            continue
+
+        move = normalize(token, board)
+        if move:
+            return board.san(move)
+
+    tagged = _move_tag.search(text or "")
+    return tagged.group(1).strip() if tagged else None
@@ -0,0 +1,158 @@
+import os
+import time
+import random
+import threading
+import boto3
+from deadline import optional_call_config
+
+# Weight of the newest attempt in the running legal-move rate and latency
+SMOOTHING = 0.1
+
+# Assumed legal-move rate of a model without statistics yet
+PRIOR_LEGAL_RATE = 0.8
+
+# Attempts seen before the statistics are trusted over the prior
+MIN_SAMPLES = 10
+
+# Below this legal-move rate a retry is unlikely to pay off, one attempt only
+RETRY_RATE = 0.5
+
+# Below this legal-move rate the model is skipped for the engine fallback
+ENGINE_RATE = 0.15
+
+# Share of moves a skipped model still gets one attempt, so its rate can recover
+EXPLORE_RATE = 0.1
+
+# Temperatures of the retries of a model, the bump grows with its failure rate
+BASE_TEMPERATURE = 0.6
+TEMPERATURE_STEP = 0.4
+MAX_TEMPERATURE = 1.0
+
+# Time kept for the engine fallback and publishing after the attempts (ms)
+ATTEMPT_RESERVE = 15000
+
+# Seconds the persisted statistics are used before they are read again
+REFRESH = 60
+
+
+class RetryPolicy:
+    """
+    Running legal-move rate and latency per model id, used to plan the
+    attempts of a move: how many, at which temperatures, or none at all
+    when the engine fallback is the better bet. Statistics live in memory
+    for warm invocations and, when a table name is given, in DynamoDB so
+    every container starts from what the others learned.
+    """
+
+    def __init__(self, table_name=None):
+        self.table_name = table_name
+        self._stats = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._dynamodb_client = None
+
+    @property
+    def dynamodb_client(self):
+        if self._dynamodb_client is None:
+            self._dynamodb_client = boto3.client(
+                "dynamodb", config=optional_call_config()
+            )
+        return self._dynamodb_client
+
+    def _load(self, model_id):
+        if not self.table_name or time.time() - self._loaded.get(model_id, 0) < REFRESH:
+            return
+        self._loaded[model_id] = time.time()
+
+        try:
+            item = self.dynamodb_client.get_item(
+                TableName=self.table_name, Key={"PolicyKey": {"S": model_id}}
+            ).get("Item")
+        except Exception as e:
+            print(f"Retry policy lookup failed: {str(e)}")
+            return
+
+        if item:
+            with self._lock:
+                self._stats[model_id] = {
+                    "samples": int(item["Samples"]["N"]),
+                    "legal_rate": float(item["LegalRate"]["N"]),
+                    "latency_ms": float(item["LatencyMs"]["N"]),
+                }
+
+    def stats(self, model_id):
+        self._load(model_id)
+        return self._stats.get(
+            model_id,
+            {"samples": 0, "legal_rate": PRIOR_LEGAL_RATE, "latency_ms": None},
+        )
+
+    def record(self, model_id, legal, latency_ms=None):
+        stats = self.stats(model_id)
+
+        with self._lock:
+            stats = dict(self._stats.get(model_id, stats))
+            stats["samples"] += 1
+            stats["legal_rate"] += SMOOTHING * (legal - stats["legal_rate"])
+            if latency_ms is not None:
+                previous = stats["latency_ms"]
+                stats["latency_ms"] = (
+                    latency_ms
+                    if previous is None
+                    else previous + SMOOTHING * (latency_ms - previous)
+                )
+            self._stats[model_id] = stats
+
+    def save(self, model_id):
+        """Persist the statistics of a model, the last container to write wins"""
+        stats = self._stats.get(model_id)
+        if not self.table_name or not stats:
+            return
+
+        try:
+            self.dynamodb_client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "PolicyKey": {"S": model_id},
+                    "Samples": {"N": str(stats["samples"])},
+                    "LegalRate": {"N": str(round(stats["legal_rate"], 4))},
+                    "LatencyMs": {"N": str(round(stats["latency_ms"] or 0))},
+                },
+            )
+        except Exception as e:
+            print(f"Retry policy write failed: {str(e)}")
+
+    def plan(self, model_id, max_attempts=3, remaining_time=None):
+        """
+        Temperatures of the attempts to make, one per attempt. None keeps the
+        adapter's own schedule, an empty list goes straight to the engine.
+        """
+        stats = self.stats(model_id)
+        rate = stats["legal_rate"] if stats["samples"] >= MIN_SAMPLES else None
+
+        if rate is None:
+            return [None] * max_attempts
+
+        if rate < ENGINE_RATE:
+            attempts = 1 if random.random() < EXPLORE_RATE else 0
+        elif rate < RETRY_RATE:
+            attempts = 1
+        else:
+            attempts = max_attempts
+
+        # Don't start attempts the invocation has no time left for
+        if remaining_time is not None and stats["latency_ms"]:
+            affordable = int((remaining_time - ATTEMPT_RESERVE) / stats["latency_ms"])
+            attempts = max(0, min(attempts, affordable))
+
+        if not attempts:
+            return []
+
+        step = TEMPERATURE_STEP * (1 - rate)
+        return [None] + [
+            min(MAX_TEMPERATURE, BASE_TEMPERATURE + step * tries)
+            for tries in range(1, attempts)
+        ]
+
+
+retry_policy = RetryPolicy(table_name=os.environ.get("RetryPolicyTable"))
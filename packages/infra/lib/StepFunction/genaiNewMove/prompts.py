@@ -0,0 +1,12 @@
+def list_legal_moves(board):
+    """Legal moves of the position in SAN, in a stable order so indexes can be resolved"""
+    return [board.san(move) for move in board.legal_moves]
+
+
+def legal_moves_prompt(legal_moves):
+    numbered = " ".join(f"{i}.{san}" for i, san in enumerate(legal_moves, 1))
+
+    return (
+        " The legal moves in this position are: %s. Choose one of these moves and provide either its number or its SAN in the <move></move> XML tags."
+        % numbered
+    )
@@ -0,0 +1,24 @@
+import importlib
+
+# Model id prefix -> (module, adapter), the module is only imported on first use
+PROVIDERS = {
+    "amazon": ("models.amazon", "callTitan"),
+    "anthropic": ("models.anthropic", "callClaude"),
+    "ai21": ("models.ai21", "callJurrasic"),
+    "cohere": ("models.cohere", "callCommand"),
+    "meta": ("models.meta", "callLlama"),
+    "mistral": ("models.mistral_ai", "callMistral"),
+}
+
+_adapters = {}
+
+
+def get_adapter(model_id):
+    for prefix, (module, name) in PROVIDERS.items():
+        if model_id.startswith(prefix):
+            if prefix not in _adapters:
+                _adapters[prefix] = getattr(importlib.import_module(module), name)
+
+            return _adapters[prefix]
+
+    raise Exception(f"model_id not supported {model_id}")
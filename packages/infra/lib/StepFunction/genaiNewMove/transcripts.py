@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import boto3
+from deadline import optional_call_config
+
+# Fields of a full attempt record that stay in the Step Functions state
+COMPACT_FIELDS = (
+    "attempt",
+    "move",
+    "valid",
+    "latency_ms",
+    "input_tokens",
+    "output_tokens",
+    "error",
+)
+
+
+def mark_attempt(message_attempts, tries, move, valid):
+    """Record the extracted move of an attempt and whether it was legal"""
+    for attempt in message_attempts:
+        if attempt.get("attempt") == tries and "source" not in attempt:
+            attempt["move"] = move
+            attempt["valid"] = valid
+            return attempt
+
+    return None
+
+
+def mark_failure(message_attempts, tries, error):
+    """Record an attempt that got no answer, the adapter may not have logged it"""
+    for attempt in message_attempts:
+        if attempt.get("attempt") == tries and "source" not in attempt:
+            attempt["error"] = str(error) or type(error).__name__
+            return attempt
+
+    attempt = {"attempt": tries, "error": str(error) or type(error).__name__}
+    message_attempts.append(attempt)
+    return attempt
+
+
+def compact_attempts(model_id, message_attempts):
+    """
+    Attempt records small enough for the state: prompts and raw response
+    bodies are dropped, book, cache and engine entries are kept as they are.
+    """
+    compact = []
+    for attempt in message_attempts:
+        if "source" not in attempt:
+            record = {"model": model_id, "move": None, "valid": False}
+            record.update({k: attempt[k] for k in COMPACT_FIELDS if k in attempt})
+            compact.append(record)
+
+    # Candidates finish in any order, the engine fallback always comes last
+    compact.sort(key=lambda a: a["attempt"])
+
+    return compact + [a for a in message_attempts if "source" in a]
+
+
+class S3Sink:
+    def __init__(self, bucket, prefix="transcripts/"):
+        self.bucket = bucket
+        self.prefix = prefix
+        self._s3_client = None
+
+    @property
+    def s3_client(self):
+        if self._s3_client is None:
+            self._s3_client = boto3.client("s3", config=optional_call_config())
+        return self._s3_client
+
+    def write(self, key, transcript):
+        key = f"{self.prefix}{key}.json"
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps(transcript),
+            ContentType="application/json",
+        )
+
+        return f"s3://{self.bucket}/{key}"
+
+
+class DynamoDBSink:
+    def __init__(self, table_name, ttl=30 * 24 * 60 * 60):
+        self.table_name = table_name
+        self.ttl = ttl
+        self._dynamodb_client = None
+
+    @property
+    def dynamodb_client(self):
+        if self._dynamodb_client is None:
+            self._dynamodb_client = boto3.client(
+                "dynamodb", config=optional_call_config()
+            )
+        return self._dynamodb_client
+
+    def write(self, key, transcript):
+        self.dynamodb_client.put_item(
+            TableName=self.table_name,
+            Item={
+                "TranscriptKey": {"S": key},
+                "Transcript": {"S": json.dumps(transcript)},
+                "ExpiresAt": {"N": str(int(time.time()) + self.ttl)},
+            },
+        )
+
+        return f"dynamodb://{self.table_name}/{key}"
+
+
+class LocalSink:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def write(self, key, transcript):
+        path = os.path.join(self.directory, f"{key}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(transcript, f, indent=2)
+
+        return f"file://{os.path.abspath(path)}"
+
+
+def get_sink():
+    if os.environ.get("TranscriptBucket"):
+        return S3Sink(
+            os.environ["TranscriptBucket"],
+            os.environ.get("TranscriptPrefix", "transcripts/"),
+        )
+    if os.environ.get("TranscriptTable"):
+        return DynamoDBSink(
+            os.environ["TranscriptTable"],
+            int(os.environ.get("TranscriptTTL", 30 * 24 * 60 * 60)),
+        )
+    if os.environ.get("TranscriptDir"):
+        return LocalSink(os.environ["TranscriptDir"])
+
+    return None
+
+
+transcript_sink = get_sink()
+
+
+def offload_transcript(
+    session_id, move_number, model_id, message_attempts, deadline=None, reserve=0
+):
+    """
+    Write the full prompts and response bodies of a move to the configured
+    sink and return a pointer to them. Returns None when no sink is set up,
+    the deadline leaves no time for it after reserve (ms) or the write fails,
+    the move itself never depends on the transcript.
+    """
+    if transcript_sink is None or not message_attempts:
+        return None
+    if deadline and not deadline.allows_optional_call(reserve):
+        print(f"Transcript not stored, {deadline.remaining()}ms left")
+        return None
+
+    try:
+        return transcript_sink.write(
+            f"{session_id}/{move_number:04d}",
+            {"model": model_id, "attempts": message_attempts},
+        )
+    except Exception as e:
+        print(f"Transcript not stored: {str(e)}")
+        return None
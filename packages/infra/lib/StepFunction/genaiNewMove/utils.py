@@ -1,41 +1,139 @@
 import os
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from requests_aws4auth import AWS4Auth
+from metrics import put_metrics, verbose
 
-graphql_url = os.environ["GRAPHQL_URL"]
-session = requests.Session()
-session.auth = AWS4Auth(
-    os.environ["AWS_ACCESS_KEY_ID"],
-    os.environ["AWS_SECRET_ACCESS_KEY"],
-    os.environ["AWS_REGION"],
-    "appsync",
-    session_token=os.environ["AWS_SESSION_TOKEN"],
-)
-
-
-def send_to_appsync(SessionID, Comment, Author):
-    Comment = Comment.replace('"', "'")
-
-    query = """
-    mutation CreateComment {
-        createComment(input: {SessionID: "%s", Comment: "%s", Author: "%s"}) {
-            SK
-            Comment
-            Author
-            SessionID
-        } 
+CREATE_COMMENT = """
+mutation CreateComment($input: CreateCommentInput!) {
+    createComment(input: $input) {
+        SK
+        Comment
+        Author
+        SessionID
     }
-    """ % (
-        SessionID,
-        Comment,
-        Author,
+}
+"""
+
+
+def build_session():
+    session = requests.Session()
+    session.auth = AWS4Auth(
+        os.environ["AWS_ACCESS_KEY_ID"],
+        os.environ["AWS_SECRET_ACCESS_KEY"],
+        os.environ["AWS_REGION"],
+        "appsync",
+        session_token=os.environ["AWS_SESSION_TOKEN"],
     )
+    # Keep-alive connections to the single AppSync host, sized for the publisher workers
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+    return session
+
+
+class AppSyncPublisher:
+    """
+    Sends createComment mutations on a small thread pool so publishing
+    overlaps the rest of the handler. The signed session is built on the first
+    publish, keeping it out of the cold start. Failed requests are retried
+    with exponential backoff; flush() waits for everything queued so far and
+    reports the time spent publishing and the comments that failed. Comments
+    are best effort, a failure is logged and never fails the move.
+    """
+
+    def __init__(self, url=None, workers=4, retries=3, backoff=0.2, timeout=5):
+        self._url = url
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = []
+
+    @property
+    def url(self):
+        return self._url or os.environ["GRAPHQL_URL"]
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                self._session = build_session()
+        return self._session
+
+    def _send(self, variables, deadline=None):
+        for attempt in range(self.retries + 1):
+            timeout = (
+                deadline.publish_timeout(self.timeout) if deadline else self.timeout
+            )
+            try:
+                if not timeout:
+                    raise Exception("No time left to publish the comment")
+
+                response = self.session.request(
+                    url=self.url,
+                    method="POST",
+                    json={"query": CREATE_COMMENT, "variables": variables},
+                    timeout=timeout,
+                )
+                resp = response.json()
+                verbose(resp)
+
+                if "errors" in resp:
+                    raise Exception(resp)
+
+                return resp
+            except Exception as e:
+                backoff = self.backoff * 2**attempt
+                # Don't retry when the backoff alone would run into the deadline
+                if attempt == self.retries or (
+                    deadline and deadline.publish_timeout(backoff) < backoff
+                ):
+                    raise
+                print(f"AppSync publish failed, retrying: {str(e)}")
+                time.sleep(backoff)
+
+    def publish(self, SessionID, Comment, Author, deadline=None):
+        variables = {
+            "input": {"SessionID": SessionID, "Comment": Comment, "Author": Author}
+        }
+        future = self._executor.submit(self._send, variables, deadline)
+        self._pending.append(future)
+
+        return future
+
+    def flush(self, timeout=None):
+        """Wait for the queued comments, returns the number that failed"""
+        started = time.monotonic()
+        pending, self._pending = self._pending, []
+        done, not_done = wait(pending, timeout=timeout)
+        failed = [f for f in done if f.exception()]
+
+        put_metrics(
+            {"Function": "genaiNewMove"},
+            {
+                "PublishLatency": (
+                    round((time.monotonic() - started) * 1000),
+                    "Milliseconds",
+                ),
+                "PublishFailures": (len(not_done) + len(failed), "Count"),
+            },
+        )
+
+        if not_done:
+            print(f"{len(not_done)} comments not published before timeout")
+        for future in failed:
+            print(f"Comment not published: {str(future.exception())}")
+
+        return len(not_done) + len(failed)
+
 
-    response = session.request(url=graphql_url, method="POST", json={"query": query})
-    resp = response.json()
-    print(resp)
+publisher = AppSyncPublisher()
 
-    if "errors" in resp:
-        raise Exception(resp)
 
-    return resp
+def send_to_appsync(SessionID, Comment, Author, deadline=None):
+    return publisher.publish(SessionID, Comment, Author, deadline).result()
@@ -1,4 +1,5 @@
 import { Ic } from "isepic-chess";
+import { nextMoveHistory } from "./gamerecord.mjs";
 
 export const handler = async (event, context) => {
   console.log(event);
@@ -8,11 +9,7 @@ export const handler = async (event, context) => {
   const isepic = Ic.initBoard({ fen: Item.Move.S });
   const isepicMove = isepic.playMove(Move);
 
-  const SanList = Item.SanList?.S ? Item.SanList.S : "";
+  const MoveHistory = nextMoveHistory(Item, isepicMove.san);
 
-  const NextSanList = `${SanList}${parseInt(Item.MoveCount.N) + 1}. ${
-    isepicMove.san
-  } `;
-
-  return { Move, SanList: NextSanList };
+  return { Move, MoveHistory };
 };
@@ -0,0 +1,52 @@
+import { Chess } from "chess.js";
+
+// Same packed game record as genaiNewMove/gamerecord.py: every move is a 16-bit
+// code (from square, to square and promotion piece) written as three URL-safe
+// base64 characters, so a move is appended without reading the rest of the game
+const ALPHABET =
+  "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_";
+const WIDTH = 3;
+const PROMOTIONS = [undefined, "n", "b", "r", "q"];
+
+const square = (name) => name.charCodeAt(0) - 97 + (Number(name[1]) - 1) * 8;
+
+export const encodeMove = ({ from, to, promotion }) => {
+  const code =
+    square(from) | (square(to) << 6) | (PROMOTIONS.indexOf(promotion) << 12);
+
+  return (
+    ALPHABET[(code >> 12) & 63] + ALPHABET[(code >> 6) & 63] + ALPHABET[code & 63]
+  );
+};
+
+// Games started before MoveHistory only have a SanList, it is replayed once
+const fromSanList = (SanList) => {
+  const game = new Chess();
+
+  return (SanList ?? "")
+    .split(" ")
+    .filter((san) => san && !san.endsWith("."))
+    .map((san) => encodeMove(game.move(san)))
+    .join("");
+};
+
+// Undefined when the game can't be recovered, the move is still played from
+// the board and only the record isn't kept
+export const nextMoveHistory = (Item, san) => {
+  const moveCount = parseInt(Item.MoveCount.N);
+  let history = Item.MoveHistory?.S ?? "";
+
+  try {
+    if (history.length / WIDTH !== moveCount) {
+      history = fromSanList(Item.SanList?.S);
+    }
+    if (history.length / WIDTH !== moveCount) {
+      throw new Error(`${history.length / WIDTH} of ${moveCount} moves`);
+    }
+
+    return history + encodeMove(new Chess(Item.Move.S).move(san));
+  } catch (error) {
+    console.log(`Move history not updated: ${error.message}`);
+    return undefined;
+  }
+};
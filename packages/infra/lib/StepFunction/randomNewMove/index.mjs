@@ -1,26 +1,23 @@
 import { Chess } from "chess.js";
+import { nextMoveHistory } from "./gamerecord.mjs";
 
 export const handler = async (event, context) => {
   console.log(event);
   const { SessionID, LatestMove, Session } = event;
   const { Item } = LatestMove;
 
-  const SanList = Item.SanList?.S ? Item.SanList.S : "";
-
   const game = new Chess(Item.Move.S);
   const possibleMoves = game.moves();
 
   const randomIdx = Math.floor(Math.random() * possibleMoves.length);
   game.move(possibleMoves[randomIdx]);
 
-  const NextSanList = `${SanList}${parseInt(Item.MoveCount.N) + 1}. ${
-    possibleMoves[randomIdx]
-  } `;
+  const MoveHistory = nextMoveHistory(Item, possibleMoves[randomIdx]);
 
   return {
     SessionID,
     Action: "MOVE",
-    PlayerOutput: { Move: game.fen(), SanList: NextSanList },
+    PlayerOutput: { Move: game.fen(), MoveHistory },
     LatestMove,
     Session,
   };
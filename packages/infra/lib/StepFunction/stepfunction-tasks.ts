@@ -62,6 +62,31 @@ export const createSFTaskChain = (
     }
   );
 
+  const pythonLibraries = new lambda.LayerVersion(self, "Python Libraries", {
+    code: lambda.Code.fromAsset(__dirname + "/genaiNewMovePackages"),
+  });
+
+  // Comments on engine fallback moves, invoked asynchronously by the GenAI
+  // function so the move doesn't wait for the commentary
+  const genAIJustification = new lambda.Function(self, "GenAI Justification", {
+    code: lambda.Code.fromAsset(__dirname + "/genaiNewMove"),
+    runtime: lambda.Runtime.PYTHON_3_11,
+    handler: "index.justification_handler",
+    timeout: Duration.seconds(30),
+    environment: {
+      GRAPHQL_URL: appSyncApi.graphqlUrl,
+      BedrockRegion,
+    },
+    layers: [pythonLibraries],
+    initialPolicy: [
+      new iam.PolicyStatement({
+        actions: ["bedrock:InvokeModel"],
+        resources: ["*"],
+      }),
+    ],
+  });
+  appSyncApi.resources.graphqlApi.grantMutation(genAIJustification);
+
   // STEP 4a: If it's a start game command, and the actor is a GenAI bot, trigger it to make a move
   // If the actor is a human, do nothing as the human will independently trigger the move from the FE
   const genAIMove = new lambda.Function(self, "Trigger GenAI", {
@@ -73,12 +98,12 @@ export const createSFTaskChain = (
     environment: {
       GRAPHQL_URL: appSyncApi.graphqlUrl,
       BedrockRegion,
+      JustificationFunction: genAIJustification.functionName,
+      // Polyglot book of the opening_book model setting, none is deployed:
+      // add one to a layer and set its path, e.g. "/opt/books/opening.bin"
+      OpeningBookPath: "",
     },
-    layers: [
-      new lambda.LayerVersion(self, "Python Libraries", {
-        code: lambda.Code.fromAsset(__dirname + "/genaiNewMovePackages"),
-      }),
-    ],
+    layers: [pythonLibraries],
     initialPolicy: [
       new iam.PolicyStatement({
         actions: ["bedrock:InvokeModel"],
@@ -86,6 +111,7 @@ export const createSFTaskChain = (
       }),
     ],
   });
+  genAIJustification.grantInvoke(genAIMove);
 
   const triggerGenAIToMakeMove = new tasks.LambdaInvoke(self, "GenAI", {
     lambdaFunction: genAIMove,